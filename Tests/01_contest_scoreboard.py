@@ -32,10 +32,38 @@ Queries
        "user:solved:penalty,user:solved:penalty,..."
      If there are no users with solved >= 1, output "" (empty string).
 
+3) ["PROBLEM_STATS", t, problem]
+   - Return "problem:solves:attempts:first_solver:first_solve_time" where
+       * solves: number of users who have solved the problem
+       * attempts: number of submissions to the problem that were not ignored
+         (every WA before a user's first AC, plus that AC)
+       * first_solver / first_solve_time: the user whose AC came first and its
+         time t; on equal t, the earlier query wins. Both are "" if unsolved.
+   - A problem nobody has submitted to yet reports "problem:0:0::".
+
+4) ["PROBLEM_STATS", t]
+   - The same entry for every problem with at least one counted submission,
+     sorted by problem name and joined with ",". Output "" if there are none.
+
+5) ["SCOREBOARD_DELTA", t, k, cursor]
+   - The scoreboard has a version: the number of first ACs so far (every first
+     AC changes exactly one user's row). A client passes the version it last
+     saw as `cursor` ("0" the first time) and gets back only the top-k rank
+     positions whose "user:solved:penalty" changed since then.
+   - Output format:
+       "version|delta|rank=user:solved:penalty,rank=user:solved:penalty,..."
+     with ranks 1-based and ascending, and nothing after the second "|" if no
+     position in the top k changed.
+   - Only the last 1024 changes are retained. If `cursor` is older than that,
+     or is not a version the scoreboard has had, the output is the full top k
+     in the same shape with "full" instead of "delta".
+   - k must be at least 1; a smaller k raises ValueError.
+
 Return value
 ~~~~~~~~~~~~
 
-Return a list of outputs (strings) for each SCOREBOARD query, in order.
+Return a list of outputs (strings) for each SCOREBOARD, PROBLEM_STATS and
+SCOREBOARD_DELTA query, in order.
 
 Notes
 ~~~~~
@@ -45,55 +73,344 @@ Notes
 
 from __future__ import annotations
 
+import asyncio
+import heapq
+import zlib
+from bisect import bisect_left, insort
+from collections import deque
+from itertools import islice
+from typing import Iterable, Iterator
+
+from _dispatch import dispatch, opcode_table
+from _workers import ShardPool, serve
+
+
+class Scoreboard:
+    def __init__(self, *, retention: int = 1024):
+        # Track per (user, problem): wrong attempts before AC + solved flag.
+        self.per_user_problem: dict[str, dict[str, list[int | bool]]] = {}
+
+        # Track per user: (solved_count, penalty_sum).
+        self.totals: dict[str, tuple[int, int]] = {}
+
+        # Users with solved >= 1 as (-solved, penalty, user), kept sorted so a
+        # SCOREBOARD is a slice instead of a sort.
+        self.ranking: list[tuple[int, int, str]] = []
+
+        # One (version, first_rank, last_rank) per first AC: the 1-based rank
+        # positions whose rows that AC changed. Oldest entries fall off.
+        self.version = 0
+        self.changes: deque[tuple[int, int, int]] = deque(maxlen=retention)
+
+        # Track per problem: [solves, attempts, first_solver, first_solve_time, first_solve_seq],
+        # updated by SUBMIT so PROBLEM_STATS never scans the users.
+        self.problem_stats: dict[str, list[int | str]] = {}
+        self.problem_names: list[str] = []  # sorted keys of problem_stats
+
+    def submitHandler(self, t: int, user: str, problem: str, verdict: str, seq: int = 0) -> None:
+        # `seq` orders ACs with equal t for first_solver; only sharded mode needs it.
+        user_state = self.per_user_problem.setdefault(user, {})
+        problem_state = user_state.get(problem)
+        if problem_state is None:
+            # [wrong_attempts_before_ac, solved(bool)]
+            problem_state = [0, False]
+            user_state[problem] = problem_state
+
+        if bool(problem_state[1]):
+            return  # ignore submissions after solved
+
+        if verdict == "WA":
+            problem_state[0] = int(problem_state[0]) + 1
+        elif verdict == "AC":
+            wrong = int(problem_state[0])
+            problem_state[1] = True
+            solved, penalty = self.totals.get(user, (0, 0))
+            self.totals[user] = (solved + 1, penalty + t + 20 * wrong)
+            self._rerank(user, (-solved, penalty, user), (-solved - 1, penalty + t + 20 * wrong, user))
+        else:
+            raise ValueError(f"Unknown verdict: {verdict!r}")
+
+        stats = self.problem_stats.get(problem)
+        if stats is None:
+            stats = self.problem_stats[problem] = [0, 0, "", "", -1]
+            insort(self.problem_names, problem)
+        stats[1] = int(stats[1]) + 1
+        if verdict == "AC":
+            if stats[0] == 0:
+                stats[2] = user
+                stats[3] = str(t)
+                stats[4] = seq
+            stats[0] = int(stats[0]) + 1
+
+    def scoreboardHandler(self, k: int) -> str:
+        return ",".join(f"{u}:{-neg}:{p}" for neg, p, u in self.ranking[:k])
+
+    def scoreboardBatchHandler(self, queries: list[list[str]]) -> list[str]:
+        # No SUBMIT lands inside the run, so the rows are formatted once for every query in it.
+        ks = [int(q[2]) for q in queries]
+        ranking = self.ranking if min(ks) < 0 else self.ranking[: max(ks)]
+        rows = [f"{u}:{-neg}:{p}" for neg, p, u in ranking]
+        return [",".join(rows[:k]) for k in ks]
+
+    def scoreboardDeltaHandler(self, k: int, cursor: int) -> str:
+        if k < 1:
+            raise ValueError(f"SCOREBOARD_DELTA needs k >= 1, got {k}")
+        since = self.version - cursor
+        if cursor < 0 or since < 0 or since > len(self.changes):
+            positions = range(1, min(k, len(self.ranking)) + 1)
+            kind = "full"
+        else:
+            # Each change touched one contiguous block of ranks; merge the blocks inside the top k.
+            blocks = sorted(
+                (first, min(last, k)) for _, first, last in islice(reversed(self.changes), since) if first <= k
+            )
+            positions = []
+            for first, last in blocks:
+                if positions:
+                    first = max(first, positions[-1] + 1)
+                positions.extend(range(first, last + 1))
+            kind = "delta"
+        ranking = self.ranking
+        rows = ",".join(f"{r}={ranking[r - 1][2]}:{-ranking[r - 1][0]}:{ranking[r - 1][1]}" for r in positions)
+        return f"{self.version}|{kind}|{rows}"
+
+    def problemStatsHandler(self, problem: str | None) -> str:
+        if problem is not None:
+            return _problem_line(problem, self.problem_stats.get(problem))
+        return ",".join(_problem_line(name, self.problem_stats[name]) for name in self.problem_names)
+
+    def _rerank(self, user: str, old: tuple[int, int, str], new: tuple[int, int, str]) -> None:
+        ranking = self.ranking
+        if old[0] < 0:
+            last = bisect_left(ranking, old)
+            del ranking[last]
+        else:
+            last = len(ranking)  # newly ranked: the row appears at the end
+        first = bisect_left(ranking, new)
+        ranking.insert(first, new)
+        # A better score only moves a user up, shifting everyone in between down by one.
+        self.version += 1
+        self.changes.append((self.version, first + 1, last + 1))
+
+
+def _problem_line(problem: str, stats: list[int | str] | None) -> str:
+    solves, attempts, first_solver, first_time = (0, 0, "", "") if stats is None else stats[:4]
+    return f"{problem}:{solves}:{attempts}:{first_solver}:{first_time}"
+
+
+def solution(queries: list[list[str]], *, batched: bool = False, workers: int = 1) -> list[str]:
+    return list(stream(queries, batched=batched, workers=workers))
+
+
+def stream(queries: Iterable[list[str]], *, batched: bool = False, workers: int = 1) -> Iterator[str]:
+    """Like solution(), but yields each output as soon as its query is processed.
+
+    With batched=True, a run of consecutive SCOREBOARD queries ranks the users
+    once and answers every k from that ranking; the run's outputs are yielded
+    when the run ends.
+
+    With workers > 1, submissions are sharded by user across that many worker
+    processes (see ShardedScoreboard); outputs are identical, but
+    SCOREBOARD_DELTA is not supported.
+    """
+    if workers > 1:
+        yield from _sharded_stream(queries, workers)
+        return
 
-def solution(queries: list[list[str]]) -> list[str]:
-    # Track per (user, problem): wrong attempts before AC + solved flag.
-    per_user_problem: dict[str, dict[str, list[int | bool]]] = {}
-
-    # Track per user: (solved_count, penalty_sum).
-    totals: dict[str, tuple[int, int]] = {}
-
-    outputs: list[str] = []
-
-    for q in queries:
-        kind = q[0]
-        if kind == "SUBMIT":
-            t = int(q[1])
-            user = q[2]
-            problem = q[3]
-            verdict = q[4]
-
-            user_state = per_user_problem.setdefault(user, {})
-            problem_state = user_state.get(problem)
-            if problem_state is None:
-                # [wrong_attempts_before_ac, solved(bool)]
-                problem_state = [0, False]
-                user_state[problem] = problem_state
-
-            if bool(problem_state[1]):
-                continue  # ignore submissions after solved
-
-            if verdict == "WA":
-                problem_state[0] = int(problem_state[0]) + 1
-            elif verdict == "AC":
-                wrong = int(problem_state[0])
-                problem_state[1] = True
-                solved, penalty = totals.get(user, (0, 0))
-                totals[user] = (solved + 1, penalty + t + 20 * wrong)
-            else:
-                raise ValueError(f"Unknown verdict: {verdict!r}")
-
-        elif kind == "SCOREBOARD":
-            k = int(q[2])
-            ranked = [(u, s, p) for u, (s, p) in totals.items() if s > 0]
-            ranked.sort(key=lambda x: (-x[1], x[2], x[0]))
-            top = ranked[:k]
-            outputs.append(",".join(f"{u}:{s}:{p}" for u, s, p in top) if top else "")
+    board = Scoreboard()
+    batches = opcode_table({"SCOREBOARD": board.scoreboardBatchHandler}) if batched else None
+    yield from dispatch(_table(board), queries, batches=batches)
 
+
+def _table(board: Scoreboard | ShardedScoreboard) -> dict:
+    return opcode_table({
+        "SUBMIT": lambda q: board.submitHandler(int(q[1]), q[2], q[3], q[4]),
+        "SCOREBOARD": lambda q: board.scoreboardHandler(int(q[2])),
+        "PROBLEM_STATS": lambda q: board.problemStatsHandler(q[2] if len(q) > 2 else None),
+        "SCOREBOARD_DELTA": lambda q: board.scoreboardDeltaHandler(int(q[2]), int(q[3])),
+    })
+
+
+def _shard_main(conn) -> None:
+    # Runs in a worker process: applies its users' submissions and answers merge requests.
+    board = Scoreboard()
+
+    def handle(request: tuple) -> object:
+        kind = request[0]
+        if kind == "submit":
+            return board.submitHandler(*request[1:])
+        if kind == "top":
+            # Sorted by the merge key; None asks for every ranked user.
+            return board.ranking[:request[1]]
+        return board.problem_stats
+
+    serve(conn, handle)
+
+
+class ShardedScoreboard:
+    """Scoreboard whose users are hash-partitioned across worker processes.
+
+    A user's submissions all go to shard crc32(user) % workers, which owns that
+    user's per-problem state and totals. Submissions are buffered per shard and
+    shipped in batches (see _workers.ShardPool); SCOREBOARD asks every shard
+    for its local top k and merges them with a k-way heap merge. PROBLEM_STATS
+    sums the shards' counters and takes the earliest first solve.
+    """
+
+    def __init__(self, workers: int):
+        self.pool = ShardPool(_shard_main, workers)
+        self.shard_of: dict[str, int] = {}
+        self.seq = 0
+
+    def submitHandler(self, t: int, user: str, problem: str, verdict: str) -> None:
+        if verdict != "WA" and verdict != "AC":
+            raise ValueError(f"Unknown verdict: {verdict!r}")
+        shard = self.shard_of.get(user)
+        if shard is None:
+            shard = self.shard_of[user] = zlib.crc32(user.encode()) % len(self.pool)
+        self.pool.send(shard, ("submit", t, user, problem, verdict, self.seq))
+        self.seq += 1
+
+    def scoreboardHandler(self, k: int) -> str:
+        limit = k if k >= 0 else None
+        merged = list(islice(heapq.merge(*self.pool.ask_all(("top", limit))), limit))
+        if k < 0:
+            merged = merged[:k]
+        return ",".join(f"{u}:{-neg}:{p}" for neg, p, u in merged)
+
+    def problemStatsHandler(self, problem: str | None) -> str:
+        combined: dict[str, list[int | str]] = {}
+        for shard_stats in self.pool.ask_all(("stats",)):
+            for name, (solves, attempts, first_solver, first_time, first_seq) in shard_stats.items():
+                stats = combined.get(name)
+                if stats is None:
+                    combined[name] = [solves, attempts, first_solver, first_time, first_seq]
+                    continue
+                stats[0] = int(stats[0]) + solves
+                stats[1] = int(stats[1]) + attempts
+                if solves and (int(stats[4]) < 0 or first_seq < int(stats[4])):
+                    stats[2:] = [first_solver, first_time, first_seq]
+        if problem is not None:
+            return _problem_line(problem, combined.get(problem))
+        return ",".join(_problem_line(name, combined[name]) for name in sorted(combined))
+
+    def scoreboardDeltaHandler(self, k: int, cursor: int) -> str:
+        # Rank positions are only known after the merge, so no shard can keep the change log.
+        raise ValueError("SCOREBOARD_DELTA is not supported with workers > 1")
+
+    def close(self) -> None:
+        self.pool.close()
+
+
+def _sharded_stream(queries: Iterable[list[str]], workers: int) -> Iterator[str]:
+    board = ShardedScoreboard(workers)
+    try:
+        yield from dispatch(_table(board), queries)
+    finally:
+        board.close()
+
+
+class _Subscriber:
+    """One subscription's latest-value slot: a flag saying its top k is stale, never a queue of updates."""
+
+    def __init__(self, k: int, writer: asyncio.StreamWriter):
+        self.k = k
+        self.writer = writer
+        self.stale = asyncio.Event()
+
+    async def pump(self, board: Scoreboard) -> None:
+        while True:
+            await self.stale.wait()
+            self.stale.clear()
+            # Formatted at send time, so every change since the last send goes out as one line.
+            self.writer.write(f"{board.version}|{board.scoreboardHandler(self.k)}\n".encode())
+            # Slow readers stall here; meanwhile further changes only re-set the flag.
+            try:
+                await self.writer.drain()
+            except ConnectionError:
+                return  # the connection handler sees the same error and unregisters
+
+
+class ScoreboardServer:
+    """Pushes top-k updates to TCP subscribers instead of making them poll SCOREBOARD.
+
+    A client connects and sends one line, "SUBSCRIBE <k>" with k >= 1. It
+    then receives "<version>|<top k in SCOREBOARD format>" lines: one straight
+    away, and one whenever a first AC changes a rank position within its top k
+    (see Scoreboard.changes). Changes that land while a line is being sent, or
+    before the subscriber's task runs, are coalesced into the next line.
+
+    Queries are fed in-process with apply(), on the server's event loop.
+    """
+
+    def __init__(self, board: Scoreboard | None = None, *, write_buffer_high: int = 64 * 1024):
+        self.board = board if board is not None else Scoreboard()
+        self.table = _table(self.board)
+        self.write_buffer_high = write_buffer_high
+        self.subscribers: set[_Subscriber] = set()
+        self.connections: set[asyncio.Task] = set()
+        self.server: asyncio.Server | None = None
+        self._seen_version = self.board.version
+
+    async def start(self, host: str = "127.0.0.1", port: int = 0) -> int:
+        """Start listening and return the bound port (useful with port=0)."""
+        self.server = await asyncio.start_server(self._serve, host, port)
+        return self.server.sockets[0].getsockname()[1]
+
+    def apply(self, queries: Iterable[list[str]]) -> list[str]:
+        outputs = list(dispatch(self.table, queries))
+        self._notify()
+        return outputs
+
+    async def close(self) -> None:
+        if self.server is not None:
+            self.server.close()
+            await self.server.wait_closed()
+        for subscriber in list(self.subscribers):
+            subscriber.writer.close()  # the connection handler then sees EOF and finishes
+        await asyncio.gather(*self.connections, return_exceptions=True)
+
+    def _notify(self) -> None:
+        board = self.board
+        since = board.version - self._seen_version
+        if since == 0:
+            return
+        self._seen_version = board.version
+        if since > len(board.changes):
+            top_changed = 1  # older changes were dropped from the log; assume the worst
         else:
-            raise ValueError(f"Unknown query type: {kind!r}")
+            top_changed = min(first for _, first, _ in islice(reversed(board.changes), since))
+        for subscriber in self.subscribers:
+            if subscriber.k >= top_changed:
+                subscriber.stale.set()
+
+    async def _serve(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter) -> None:
+        writer.transport.set_write_buffer_limits(high=self.write_buffer_high)
+        try:
+            command, k = (await reader.readline()).decode().split()
+            if command != "SUBSCRIBE" or int(k) < 1:
+                # k <= 0 slices the ranking from the end, which _notify cannot track
+                raise ValueError(command)
+            subscriber = _Subscriber(int(k), writer)
+        except ValueError:
+            writer.write(b"ERROR expected: SUBSCRIBE <k>\n")
+            writer.close()
+            return
 
-    return outputs
+        connection = asyncio.current_task()
+        self.connections.add(connection)
+        self.subscribers.add(subscriber)
+        subscriber.stale.set()  # the current top k goes out first
+        pump = asyncio.create_task(subscriber.pump(self.board))
+        try:
+            await reader.read()  # subscribers send nothing else; EOF means they left
+        except ConnectionError:
+            pass
+        finally:
+            self.connections.discard(connection)
+            self.subscribers.discard(subscriber)
+            pump.cancel()
+            writer.close()
 
 
 if __name__ == "__main__":
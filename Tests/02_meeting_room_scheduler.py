@@ -46,40 +46,201 @@ Queries
        "start-end:title,start-end:title,..."
      If there are no events, output "".
 
+6) ["NEXT_SLOT", room, after, duration]
+   - Returns the earliest start s >= after such that [s, s + duration) does
+     not overlap any event in the room. There is always one: the room is
+     free after its last event.
+   - If duration <= 0, output "-1".
+
+7) ["ARCHIVE", watermark]
+   - A storage hint: events (in every room) that end at or before
+     `watermark` may be moved to cold storage. It never changes the output
+     of any query and produces no output itself.
+
 Return value
 ~~~~~~~~~~~~
 
 Return a list of outputs (strings) for each query that produces output:
-BOOK, CANCEL, MOVE, FREE, AGENDA (in that order of occurrence).
+BOOK, CANCEL, MOVE, FREE, AGENDA, NEXT_SLOT (in that order of occurrence).
 """
 
 from __future__ import annotations
 
+import heapq
+import random
+import threading
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from itertools import accumulate
+from typing import Iterable, Iterator
 
-def solution(queries: list[list[str]]) -> list[str]:
-    agenda: dict[str, list[tuple[int, int, str]]] = {}
-    output: list[str] = []
-
-    for query in queries:
-        queryType = query[0]
-        
-        if queryType == "BOOK":
-            output.append(bookHandler(query, agenda))
-        elif queryType == "CANCEL":
-            output.append(cancelHandler(query, agenda))
-        elif queryType == "MOVE":
-            output.append(moveHandler(query, agenda))
-        elif queryType == "FREE":
-            output.append(freeHandler(query, agenda))
-        elif queryType == "AGENDA":
-            output.append(agendaHandler(query, agenda))
-        else:
-            raise ValueError(f"Unknown query type: {queryType!r}")
+from _dispatch import dispatch, opcode_table
+
+try:
+    import numpy as np
+except ImportError:  # the batched FREE path falls back to bisect
+    np = None
+
+# NumPy only pays for its list conversions on long runs; shorter ones use bisect.
+NUMPY_MIN_BATCH = 1024
+
+
+# Opcodes that never modify the agenda; they only need a room's lock shared.
+READ_OPCODES = frozenset({"FREE", "AGENDA", "NEXT_SLOT"})
+# Treap priorities come from a private generator so booking never advances the global one.
+_priorities = random.Random()
+
+
+def solution(queries: list[list[str]], *, batched: bool = False, threads: int = 1) -> list[str]:
+    return list(stream(queries, batched=batched, threads=threads))
 
-    return output
 
+def stream(queries: Iterable[list[str]], *, batched: bool = False, threads: int = 1) -> Iterator[str]:
+    """Like solution(), but yields each output as soon as its query is processed.
 
-def bookHandler(query, agenda):
+    With batched=True, a run of consecutive FREE queries is answered by
+    freeBatchHandler(); the run's outputs are yielded when the run ends.
+
+    With threads > 1, the queries run on a ConcurrentScheduler from that many
+    threads, each owning a subset of the rooms (so every room still sees its
+    queries in input order), and outputs are yielded once all threads finish.
+    Each ARCHIVE is a barrier between the queries before and after it.
+    """
+    if threads > 1:
+        yield from _threaded_stream(queries, threads)
+        return
+    agenda: dict[str, list[tuple[int, int, str]]] = {}
+    slots: dict[str, SlotTree] = {}
+    cold: dict[str, ColdSegment] = {}
+    batches = opcode_table({"FREE": lambda run: freeBatchHandler(run, agenda, cold)}) if batched else None
+    yield from dispatch(_table(agenda, slots, cold), queries, batches=batches)
+
+
+def _table(
+    agenda: dict[str, list[tuple[int, int, str]]], slots: dict[str, SlotTree], cold: dict[str, ColdSegment]
+) -> dict:
+    return opcode_table({
+        "BOOK": lambda q: bookHandler(q, agenda, slots, cold),
+        "CANCEL": lambda q: cancelHandler(q, agenda, slots, cold),
+        "MOVE": lambda q: moveHandler(q, agenda, slots, cold),
+        "FREE": lambda q: freeHandler(q, agenda, cold),
+        "AGENDA": lambda q: agendaHandler(q, agenda, cold),
+        "NEXT_SLOT": lambda q: nextSlotHandler(q, slots, cold),
+        "ARCHIVE": lambda q: archiveHandler(q, agenda, slots, cold),
+    })
+
+
+class RWLock:
+    """Any number of readers or one writer. A waiting writer holds off new readers, so it cannot starve."""
+
+    def __init__(self):
+        self._cond = threading.Condition(threading.Lock())
+        self._readers = 0
+        self._writer = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self) -> Iterator[None]:
+        with self._cond:
+            while self._writer or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self) -> Iterator[None]:
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writer or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writer = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writer = False
+                self._cond.notify_all()
+
+
+class ConcurrentScheduler:
+    """The scheduler behind a lock per stripe of rooms, for calling handle() from many threads.
+
+    Bookings in different rooms never interact, so each query only takes the
+    lock of its room's stripe: exclusively for BOOK/CANCEL/MOVE, shared for
+    FREE/AGENDA. Queries on rooms in different stripes run without waiting on
+    each other, and reads of the same stripe do not block one another.
+    ARCHIVE visits the rooms one at a time, each under its own lock.
+    """
+
+    def __init__(self, stripes: int = 64):
+        self.agenda: dict[str, list[tuple[int, int, str]]] = {}
+        self.slots: dict[str, SlotTree] = {}
+        self.cold: dict[str, ColdSegment] = {}
+        self.table = _table(self.agenda, self.slots, self.cold)
+        self.stripes = [RWLock() for _ in range(stripes)]
+
+    def lock_for(self, room: str) -> RWLock:
+        return self.stripes[zlib.crc32(room.encode()) % len(self.stripes)]
+
+    def handle(self, query: list[str]) -> str | None:
+        if query[0] == "ARCHIVE":
+            watermark = int(query[1])
+            for room in list(self.agenda):
+                with self.lock_for(room).write():
+                    archiveRoom(room, watermark, self.agenda, self.slots, self.cold)
+            return None
+        handler = self.table.get(query[0])
+        if handler is None:
+            raise ValueError(f"Unknown query type: {query[0]!r}")
+        lock = self.lock_for(query[1])
+        with lock.read() if query[0] in READ_OPCODES else lock.write():
+            return handler(query)
+
+
+def _threaded_stream(queries: Iterable[list[str]], threads: int) -> Iterator[str]:
+    queries = list(queries)
+    scheduler = ConcurrentScheduler()
+    outputs: list[str | None] = [None] * len(queries)
+    # Rooms are dealt out to threads round-robin in order of first appearance.
+    owner: dict[str, int] = {}
+
+    def run(lane: list[int]) -> None:
+        handle = scheduler.handle
+        for i in lane:
+            outputs[i] = handle(queries[i])
+
+    with ThreadPoolExecutor(max_workers=threads) as pool:
+        lanes: list[list[int]] = [[] for _ in range(threads)]
+
+        def drain() -> None:
+            for done in [pool.submit(run, lane) for lane in lanes if lane]:
+                done.result()
+            for lane in lanes:
+                lane.clear()
+
+        for i, query in enumerate(queries):
+            if query[0] == "ARCHIVE":
+                # ARCHIVE touches every room: it waits for the queries before it
+                # and runs on this thread before any query after it starts.
+                drain()
+                scheduler.handle(query)
+            else:
+                lanes[owner.setdefault(query[1], len(owner) % threads)].append(i)
+        drain()
+    yield from (output for output in outputs if output is not None)
+
+
+def bookHandler(query, agenda, slots, cold):
     room = str(query[1])
     start = int(query[2])
     end = int(query[3])
@@ -96,13 +257,19 @@ def bookHandler(query, agenda):
         if start < agenda_end and agenda_start < end:
             return "false"
 
+    # Archived events are sorted, so one binary search covers them
+    segment = cold.get(room)
+    if segment is not None and segment.conflicts(start, end):
+        return "false"
+
     # We know now that the event can be booked
     events.append((start, end, title))
     events.sort(key=lambda x: (x[0], x[1], x[2]))
+    slots.setdefault(room, SlotTree()).insert(start, end)
     return "true"
     
 
-def cancelHandler(query, agenda):
+def cancelHandler(query, agenda, slots, cold):
     room = str(query[1])
     title = str(query[2])
 
@@ -113,17 +280,25 @@ def cancelHandler(query, agenda):
     for agenda_start, agenda_end, agenda_title in events:
         if agenda_title == title:
             potentialRemove.append((agenda_start, agenda_end, agenda_title))
+    potentialRemove.sort(key=lambda x: (x[0], x[1], x[2]))
+
+    # The earliest event with this title may have been archived
+    segment = cold.get(room)
+    archived = segment.first(title) if segment is not None else None
+    if archived is not None and (len(potentialRemove) == 0 or segment[archived] < potentialRemove[0]):
+        _replace_cold(cold, room, segment.without(archived))
+        return "true"
 
     if len(potentialRemove) == 0:
         return "false"
 
-    potentialRemove.sort(key=lambda x: (x[0], x[1], x[2]))
     events.remove(potentialRemove[0])
+    slots[room].remove(potentialRemove[0][0])
     return "true"
 
             
 
-def moveHandler(query, agenda):
+def moveHandler(query, agenda, slots, cold):
     room = str(query[1])
     title = str(query[2])
     new_start = int(query[3])
@@ -139,29 +314,49 @@ def moveHandler(query, agenda):
     for agenda_start, agenda_end, agenda_title in events:
         if agenda_title == title:
             potentialRemove.append((agenda_start, agenda_end, agenda_title))
+    potentialRemove.sort(key=lambda x: (x[0], x[1], x[2]))
 
-    if len(potentialRemove) == 0:
-        return "false"
+    # The earliest event with this title may have been archived
+    segment = cold.get(room)
+    archived = segment.first(title) if segment is not None else None
+    from_cold = archived is not None and (len(potentialRemove) == 0 or segment[archived] < potentialRemove[0])
 
-    potentialRemove.sort(key=lambda x: (x[0], x[1], x[2]))
-    old_event = potentialRemove[0]
-    events.remove(old_event)
+    if from_cold:
+        old_event = segment[archived]
+        # Segments are immutable: the stored one stays in place unless the move succeeds
+        segment = segment.without(archived)
+    elif len(potentialRemove) == 0:
+        return "false"
+    else:
+        old_event = potentialRemove[0]
+        events.remove(old_event)
 
     # Fail check if we cannot add event to cleared agenda
+    conflict = segment is not None and segment.conflicts(new_start, new_end)
     for agenda_start, agenda_end, agenda_title in events:
         if new_start < agenda_end and agenda_start < new_end:
-            # Fail move and re-add the event
+            conflict = True
+            break
+    if conflict:
+        # Fail move and re-add the event
+        if not from_cold:
             events.append(old_event)
             events.sort(key=lambda x: (x[0], x[1], x[2]))
-            return "false"
+        return "false"
 
-    # All checks passed, move event (just re-add it)
+    # All checks passed, move event (just re-add it, hot again)
+    tree = slots.setdefault(room, SlotTree())
+    if from_cold:
+        _replace_cold(cold, room, segment)
+    else:
+        tree.remove(old_event[0])
     events.append((new_start, new_end, title))
     events.sort(key=lambda x: (x[0], x[1], x[2]))
+    tree.insert(new_start, new_end)
     return "true"
 
 
-def freeHandler(query, agenda):
+def freeHandler(query, agenda, cold):
     room = str(query[1])
     start = int(query[2])
     end = int(query[3])
@@ -169,8 +364,8 @@ def freeHandler(query, agenda):
     if start >= end:
         return "0"
 
-    # Get room dict values
-    events = agenda.setdefault(room, [])
+    # Reads never create the room, so they can share a lock
+    events = agenda.get(room, ())
 
     free_minutes = end - start
     unavailableRanges = []
@@ -196,24 +391,332 @@ def freeHandler(query, agenda):
     if current_start is not None and current_end is not None:
         removed_minutes += current_end - current_start
 
+    # Archived events never overlap the hot ones, so their busy minutes just add up
+    segment = cold.get(room)
+    if segment is not None:
+        removed_minutes += segment.busy(start, end)
+
     return str(free_minutes - removed_minutes)
             
-def agendaHandler(query, agenda):
+def freeBatchHandler(queries, agenda, cold):
+    # Events in a room never overlap and are kept sorted by start, so their
+    # ends are sorted too. With prefix sums of event lengths, the busy minutes
+    # in [start, end) come from two binary searches per query, after one pass
+    # over each queried room for the whole run.
+    outputs = ["0"] * len(queries)
+    by_room: dict[str, list[int]] = {}
+    for i, query in enumerate(queries):
+        by_room.setdefault(str(query[1]), []).append(i)
+
+    for room, indexes in by_room.items():
+        events = agenda.setdefault(room, [])
+        starts = [event[0] for event in events]
+        ends = [event[1] for event in events]
+        busy_before = list(accumulate((e - s for s, e, _ in events), initial=0))
+        lows = [int(queries[i][2]) for i in indexes]
+        highs = [int(queries[i][3]) for i in indexes]
+        segment = cold.get(room)
+
+        if np is not None and len(indexes) >= NUMPY_MIN_BATCH:
+            firsts = np.searchsorted(np.asarray(ends), np.asarray(lows), side="right").tolist()
+            lasts = np.searchsorted(np.asarray(starts), np.asarray(highs), side="left").tolist()
+        else:
+            firsts = [bisect_right(ends, start) for start in lows]
+            lasts = [bisect_left(starts, end) for end in highs]
+
+        for i, start, end, first, last in zip(indexes, lows, highs, firsts, lasts):
+            if start >= end:
+                continue  # already "0"
+            # Events first..last-1 overlap [start, end); clip the two at the edges.
+            busy = 0
+            if first < last:
+                busy = busy_before[last] - busy_before[first]
+                busy -= max(0, start - starts[first]) + max(0, ends[last - 1] - end)
+            if segment is not None:
+                busy += segment.busy(start, end)
+            outputs[i] = str(end - start - busy)
+    return outputs
+
+
+def agendaHandler(query, agenda, cold):
     room = str(query[1])
-    events = agenda.setdefault(room, [])
-    if not events:
+    events = agenda.get(room, ())
+    segment = cold.get(room)
+    if segment is not None:
+        # Both tiers are sorted; merging them restores the full history
+        events = heapq.merge(segment, events)
+    elif not events:
         return ""
-    
-    # Sort by start time
-    events.sort(key=lambda x: (x[0], x[1], x[2]))
-    
+
+    # Events are kept sorted by (start, end, title); sorting here would mutate under a shared lock
     # Format output
     output = []
     for agenda_start, agenda_end, agenda_title in events:
         output.append(f"{agenda_start}-{agenda_end}:{agenda_title}")
     
     return ",".join(output)
-    
+
+
+def nextSlotHandler(query, slots, cold):
+    room = str(query[1])
+    after = int(query[2])
+    duration = int(query[3])
+
+    if duration <= 0:
+        return "-1"
+
+    # The treap only holds hot events; archived ones answer from their segment.
+    # Each tier returns its own earliest fit, so alternate until both agree.
+    # A round that moves the slot skips an archived event, and later rounds
+    # only happen when hot bookings sit between archived ones.
+    tree = slots.get(room)
+    segment = cold.get(room)
+    slot = after
+    while True:
+        if tree is not None:
+            slot = tree.next_slot(slot, duration)
+        if segment is None:
+            return str(slot)
+        fit = segment.next_slot(slot, duration)
+        if fit == slot:
+            return str(slot)
+        slot = fit
+
+
+class _SlotNode:
+    __slots__ = ("start", "end", "priority", "left", "right", "min_s", "max_e", "max_gap")
+
+    def __init__(self, start: int, end: int):
+        self.start = self.min_s = start
+        self.end = self.max_e = end
+        self.priority = _priorities.random()
+        self.left: _SlotNode | None = None
+        self.right: _SlotNode | None = None
+        self.max_gap = 0
+
+
+def _pull(node: _SlotNode) -> None:
+    # Events never overlap, so the rightmost event of a subtree also ends last.
+    left, right = node.left, node.right
+    node.min_s = left.min_s if left else node.start
+    node.max_e = right.max_e if right else node.end
+    gap = 0
+    if left:
+        gap = max(left.max_gap, node.start - left.max_e)
+    if right:
+        gap = max(gap, right.max_gap, right.min_s - node.end)
+    node.max_gap = gap
+
+
+def _split(node: _SlotNode | None, start: int) -> tuple[_SlotNode | None, _SlotNode | None]:
+    """Split into the events starting before `start` and the rest."""
+    if node is None:
+        return None, None
+    if node.start < start:
+        node.right, rest = _split(node.right, start)
+        _pull(node)
+        return node, rest
+    before, node.left = _split(node.left, start)
+    _pull(node)
+    return before, node
+
+
+def _merge(a: _SlotNode | None, b: _SlotNode | None) -> _SlotNode | None:
+    # Every event in `a` starts before every event in `b`.
+    if a is None:
+        return b
+    if b is None:
+        return a
+    if a.priority > b.priority:
+        a.right = _merge(a.right, b)
+        _pull(a)
+        return a
+    b.left = _merge(a, b.left)
+    _pull(b)
+    return b
+
+
+def _first_fit(node: _SlotNode | None, prev_end: int | None, after: int, duration: int) -> int | None:
+    """Earliest s >= after with [s, s + duration) in the gap before one of this subtree's events.
+
+    prev_end is the end of the event just before the subtree (None if there
+    is none). Once prev_end >= after, every gap in the subtree lies after
+    `after`, so max_gap rules a subtree in or out exactly and the search
+    follows a single path.
+    """
+    if node is None:
+        return None
+    if prev_end is not None and prev_end >= after and max(node.min_s - prev_end, node.max_gap) < duration:
+        return None
+    if node.start <= after:
+        # Gaps before this event and everything left of it close by `after`.
+        return _first_fit(node.right, node.end, after, duration)
+    found = _first_fit(node.left, prev_end, after, duration)
+    if found is not None:
+        return found
+    before = node.left.max_e if node.left else prev_end
+    slot = after if before is None else max(before, after)
+    if node.start - slot >= duration:
+        return slot
+    return _first_fit(node.right, node.end, after, duration)
+
+
+class SlotTree:
+    """A room's hot events as a treap keyed by start, for NEXT_SLOT.
+
+    Each node also keeps its subtree's first start, last end and the largest
+    gap between consecutive events in it, which are restored bottom-up
+    whenever split/merge rebuild a path. Insert, remove and next_slot are
+    O(log n) expected.
+    """
+
+    def __init__(self):
+        self.root: _SlotNode | None = None
+
+    def insert(self, start: int, end: int) -> None:
+        before, rest = _split(self.root, start)
+        self.root = _merge(_merge(before, _SlotNode(start, end)), rest)
+
+    def remove(self, start: int) -> None:
+        before, rest = _split(self.root, start)
+        _, after = _split(rest, start + 1)
+        self.root = _merge(before, after)
+
+    def drop_before(self, start: int | None) -> None:
+        """Forget every event starting before `start` (all of them if it is None)."""
+        self.root = None if start is None else _split(self.root, start)[1]
+
+    def next_slot(self, after: int, duration: int) -> int:
+        slot = _first_fit(self.root, None, after, duration)
+        if slot is None:
+            # No gap fits before the last event; the room is free after it.
+            slot = after if self.root is None else max(self.root.max_e, after)
+        return slot
+
+
+def archiveHandler(query, agenda, slots, cold):
+    watermark = int(query[1])
+    for room in agenda:
+        archiveRoom(room, watermark, agenda, slots, cold)
+    return None
+
+
+def archiveRoom(room, watermark, agenda, slots, cold):
+    events = agenda[room]
+    past = [event for event in events if event[1] <= watermark]
+    if not past:
+        return
+    # Keep the hot list's identity: other handlers may hold a reference to it
+    events[:] = [event for event in events if event[1] > watermark]
+    segment = cold.get(room)
+    cold[room] = ColdSegment(heapq.merge(segment, past) if segment is not None else past)
+    # Events never overlap, so every archived event starts before every event
+    # left hot: one split drops them all from the treap
+    slots[room].drop_before(events[0][0] if events else None)
+
+
+def _replace_cold(cold, room, segment):
+    if segment is None:
+        del cold[room]
+    else:
+        cold[room] = segment
+
+
+class ColdSegment:
+    """A room's archived events: immutable, sorted by start and stored column-wise.
+
+    Starts, ends and prefix sums of event lengths sit in compact int64 arrays,
+    so conflicts() and busy() are binary searches rather than scans, and the
+    earliest event of each title is indexed for CANCEL/MOVE. A max-tree over
+    the gaps between consecutive events, also an int64 array, answers
+    next_slot() in O(log n), so archived events need no treap nodes. A change to an
+    archived event builds a new segment; the old one is never modified,
+    which lets MOVE try a removal and simply drop it on failure.
+    """
+
+    __slots__ = ("starts", "ends", "titles", "busy_before", "first_index", "gap_leaves", "gap_tree")
+
+    def __init__(self, events: Iterable[tuple[int, int, str]]):
+        self.starts = array("q")
+        self.ends = array("q")
+        self.titles: list[str] = []
+        for start, end, title in events:
+            self.starts.append(start)
+            self.ends.append(end)
+            self.titles.append(title)
+        self.busy_before = array("q", accumulate((e - s for s, e in zip(self.starts, self.ends)), initial=0))
+        self.first_index: dict[str, int] = {}
+        for i, title in enumerate(self.titles):
+            self.first_index.setdefault(title, i)
+        # gap_tree[gap_leaves + i] = free minutes between events i - 1 and i (0 for i = 0);
+        # each inner node holds the larger of its two children.
+        self.gap_leaves = 1
+        while self.gap_leaves < len(self.starts):
+            self.gap_leaves *= 2
+        self.gap_tree = array("q", bytes(16 * self.gap_leaves))
+        for i in range(1, len(self.starts)):
+            self.gap_tree[self.gap_leaves + i] = self.starts[i] - self.ends[i - 1]
+        for node in range(self.gap_leaves - 1, 0, -1):
+            self.gap_tree[node] = max(self.gap_tree[2 * node], self.gap_tree[2 * node + 1])
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __getitem__(self, i: int) -> tuple[int, int, str]:
+        return self.starts[i], self.ends[i], self.titles[i]
+
+    def __iter__(self) -> Iterator[tuple[int, int, str]]:
+        return zip(self.starts, self.ends, self.titles)
+
+    def first(self, title: str) -> int | None:
+        """Index of the earliest archived event with this title, if any."""
+        return self.first_index.get(title)
+
+    def without(self, i: int) -> ColdSegment | None:
+        if len(self) == 1:
+            return None
+        return ColdSegment(event for j, event in enumerate(self) if j != i)
+
+    def conflicts(self, start: int, end: int) -> bool:
+        # Events never overlap, so the last one starting before `end` also ends last.
+        i = bisect_left(self.starts, end) - 1
+        return i >= 0 and self.ends[i] > start
+
+    def next_slot(self, after: int, duration: int) -> int:
+        """Earliest s >= after with [s, s + duration) clear of archived events."""
+        i = bisect_right(self.ends, after)
+        if i == len(self.starts) or self.starts[i] - after >= duration:
+            return after
+        # Event i is in the way; the answer is the end of the event before the
+        # first later gap that is wide enough, or the end of the last event.
+        j = self._first_gap(i + 1, duration)
+        return self.ends[-1 if j is None else j - 1]
+
+    def _first_gap(self, i: int, duration: int) -> int | None:
+        """Smallest j >= i whose gap before event j is at least `duration` minutes."""
+        if i >= len(self.starts):
+            return None
+        tree = self.gap_tree
+        node = self.gap_leaves + i
+        # Climb until a subtree starting at or right of i holds a wide enough gap.
+        while tree[node] < duration:
+            while node & 1:
+                node >>= 1
+            if not node:
+                return None
+            node += 1
+        while node < self.gap_leaves:
+            node = 2 * node if tree[2 * node] >= duration else 2 * node + 1
+        return node - self.gap_leaves
+
+    def busy(self, start: int, end: int) -> int:
+        """Minutes of [start, end) taken by archived events."""
+        first = bisect_right(self.ends, start)
+        last = bisect_left(self.starts, end)
+        if first >= last:
+            return 0
+        busy = self.busy_before[last] - self.busy_before[first]
+        return busy - max(0, start - self.starts[first]) - max(0, self.ends[last - 1] - end)
 
 
 if __name__ == "__main__":
@@ -50,6 +50,12 @@ Transactions:
    - Rolls back (undoes) the most recent transaction.
    - Output: "true" if a transaction was rolled back, else "false".
 
+Lookups:
+
+8) ["FIND", field, value]
+   - Output a comma-separated list of the keys whose `field` currently
+     equals `value`, sorted lexicographically, or "" if there are none.
+
 Semantics
 ~~~~~~~~~
 
@@ -62,19 +68,74 @@ Return value
 ~~~~~~~~~~~~
 
 Return a list of outputs (strings) for each query that produces output:
-GET, DELETE, FIELDS, COMMIT, ROLLBACK (in order of occurrence).
+GET, DELETE, FIELDS, COMMIT, ROLLBACK, FIND (in order of occurrence).
 """
 
 from __future__ import annotations
 
+import heapq
+import zlib
+from collections import deque
+from typing import Iterable, Iterator
+
+from _dispatch import dispatch, opcode_table
+from _workers import ShardPool, serve
+
+
+Change = tuple[str, str, "str | None"]  # (key, field, new value or None if deleted)
+
+
+class ChangeFeed:
+    """Durable changes as numbered batches, for caches that mirror the base store.
+
+    Every top-level COMMIT that changes something, and every change made
+    outside a transaction, becomes one batch with the next sequence number
+    (starting at 1). Only the last `retention` batches are kept. A consumer
+    remembers the last sequence number it applied and resumes with since().
+    """
+
+    def __init__(self, retention: int = 1024):
+        self.seq = 0
+        self.batches: deque[tuple[int, list[Change]]] = deque(maxlen=retention)
+
+    def publish(self, changes: list[Change]) -> None:
+        if changes:
+            self.seq += 1
+            self.batches.append((self.seq, changes))
+
+    def since(self, seq: int) -> list[tuple[int, list[Change]]]:
+        """The batches after `seq`, oldest first.
+
+        Raises ValueError if some of them have been dropped (or `seq` was never
+        issued); the consumer then has to re-read the store and resume from
+        the current `seq`.
+        """
+        if not 0 <= seq <= self.seq:
+            raise ValueError(f"sequence {seq} was never issued (latest is {self.seq})")
+        missing = self.seq - seq
+        if missing > len(self.batches):
+            raise ValueError(f"sequence {seq} is older than the retained feed (oldest batch {self.batches[0][0]})")
+        return list(self.batches)[len(self.batches) - missing:]
+
+
 class Database:
-    def __init__(self):
+    def __init__(self, indexes: Iterable[str] = (), feed_retention: int | None = None):
         self.store: dict[str, dict[str, str]] = {}
         self.tx_stack: list[dict[str, dict[str, str | None]]] = []
+        # Opt-in secondary indexes: field -> value -> keys, always matching what reads see
+        self.indexes: dict[str, dict[str, set[str]]] = {field: {} for field in indexes}
+        # Per open transaction, the index changes it made, as (key, field, old, new)
+        self.index_undo: list[list[tuple[str, str, str | None, str | None]]] = []
+        self.feed = ChangeFeed(feed_retention) if feed_retention else None
 
     def setHandler(self, key, field, value):
+        if field in self.indexes:
+            self._reindex(key, field, self._resolveValue(key, field), value)
         if len(self.tx_stack) == 0:
-            self.store.setdefault(key, {})[field] = value
+            fields = self.store.setdefault(key, {})
+            if self.feed is not None and fields.get(field) != value:
+                self.feed.publish([(key, field, value)])
+            fields[field] = value
             return
         layer = self.tx_stack[-1]
         layer.setdefault(key, {})[field] = value
@@ -83,14 +144,32 @@ class Database:
         val = self._resolveValue(key, field)
         return "" if val is None else val
 
+    def getBatchHandler(self, queries):
+        # Nothing is written during a run of GETs, so each distinct key.field
+        # is resolved through the transaction layers only once.
+        resolved: dict[tuple[str, str], str] = {}
+        outputs = []
+        for query in queries:
+            key_field = (query[1], query[2])
+            value = resolved.get(key_field)
+            if value is None:
+                value = resolved[key_field] = self.getHandler(query[1], query[2])
+            outputs.append(value)
+        return outputs
+
     def deleteHandler(self, key, field):
-        if self._resolveValue(key, field) is None:
+        old = self._resolveValue(key, field)
+        if old is None:
             return "false"
+        if field in self.indexes:
+            self._reindex(key, field, old, None)
 
         if len(self.tx_stack) == 0:
             self.store.get(key, {}).pop(field, None)
             if key in self.store and len(self.store[key]) == 0:
                 self.store.pop(key, None)
+            if self.feed is not None:
+                self.feed.publish([(key, field, None)])
             return "true"
 
         layer = self.tx_stack[-1]
@@ -114,13 +193,31 @@ class Database:
         items = sorted(view.items(), key=lambda kv: kv[0])
         return ",".join(f"{field}={value}" for field, value in items)
 
+    def findHandler(self, field, value):
+        index = self.indexes.get(field)
+        if index is not None:
+            keys = index.get(value, ())
+        else:
+            # Unindexed field: every key in the base store or any open layer is a candidate
+            candidates = set(self.store).union(*self.tx_stack)
+            keys = [key for key in candidates if self._resolveValue(key, field) == value]
+        return ",".join(sorted(keys))
+
     def beginHandler(self):
         self.tx_stack.append({})
+        if self.indexes:
+            self.index_undo.append([])
 
     def commitHandler(self):
         if len(self.tx_stack) == 0:
             return "false"
 
+        if self.indexes:
+            # The parent now owns these changes; a top-level commit just forgets them
+            undo = self.index_undo.pop()
+            if self.index_undo:
+                self.index_undo[-1].extend(undo)
+
         top = self.tx_stack.pop()
         if len(self.tx_stack) > 0:
             parent = self.tx_stack[-1]
@@ -129,8 +226,12 @@ class Database:
                 for field, value in fields.items():
                     parent_fields[field] = value
         else:
+            # Only fields whose base value actually changes reach the feed
+            changes = [] if self.feed is not None else None
             for key, fields in top.items():
                 for field, value in fields.items():
+                    if changes is not None and self.store.get(key, {}).get(field) != value:
+                        changes.append((key, field, value))
                     if value is None:
                         if key in self.store:
                             self.store[key].pop(field, None)
@@ -138,6 +239,8 @@ class Database:
                                 self.store.pop(key, None)
                     else:
                         self.store.setdefault(key, {})[field] = value
+            if changes:
+                self.feed.publish(changes)
 
         return "true"
 
@@ -145,8 +248,28 @@ class Database:
         if len(self.tx_stack) == 0:
             return "false"
         self.tx_stack.pop()
+        if self.indexes:
+            for key, field, old, new in reversed(self.index_undo.pop()):
+                self._move(key, field, new, old)
         return "true"
 
+    def _reindex(self, key: str, field: str, old: str | None, new: str | None) -> None:
+        if old == new:
+            return
+        self._move(key, field, old, new)
+        if self.index_undo:
+            self.index_undo[-1].append((key, field, old, new))
+
+    def _move(self, key: str, field: str, old: str | None, new: str | None) -> None:
+        index = self.indexes[field]
+        if old is not None:
+            keys = index[old]
+            keys.discard(key)
+            if not keys:
+                del index[old]
+        if new is not None:
+            index.setdefault(new, set()).add(key)
+
     def _resolveValue(self, key: str, field: str) -> str | None:
         for layer in reversed(self.tx_stack):
             if key not in layer:
@@ -158,29 +281,138 @@ class Database:
 
     
 
-def solution(queries: list[list[str]]) -> list[str]:
-    db = Database()
-    outputs = []
-    for query in queries:
-        queryType, key, field, value = (query+ [None, None, None, None])[:4]
-
-        if queryType == "SET":
-            db.setHandler(key, field, value)
-        elif queryType == "GET":
-            outputs.append(db.getHandler(key, field))
-        elif queryType == "DELETE":
-            outputs.append(db.deleteHandler(key, field))
-        elif queryType == "FIELDS":
-            outputs.append(db.fieldsHandler(key))
-        elif queryType == "BEGIN":
-            db.beginHandler()
-        elif queryType == "COMMIT":
-            outputs.append(db.commitHandler())
-        elif queryType == "ROLLBACK":
-            outputs.append(db.rollbackHandler())
-        else:
-            raise ValueError(f"Unknown query type: {queryType!r}")
-    return outputs
+def solution(
+    queries: list[list[str]], *, batched: bool = False, indexes: Iterable[str] = (), workers: int = 1
+) -> list[str]:
+    return list(stream(queries, batched=batched, indexes=indexes, workers=workers))
+
+
+def stream(
+    queries: Iterable[list[str]], *, batched: bool = False, indexes: Iterable[str] = (), workers: int = 1
+) -> Iterator[str]:
+    """Like solution(), but yields each output as soon as its query is processed.
+
+    With batched=True, a run of consecutive GET queries is answered by
+    Database.getBatchHandler(); the run's outputs are yielded when the run ends.
+
+    `indexes` names fields to keep a value -> keys index for, so FIND on
+    them costs O(result) instead of a scan of every key.
+
+    With workers > 1, keys are sharded across that many worker processes
+    (see ShardedDatabase); outputs are identical and `batched` is ignored.
+    """
+    if workers > 1:
+        yield from _sharded_stream(queries, workers, tuple(indexes))
+        return
+
+    db = Database(indexes)
+    batches = opcode_table({"GET": db.getBatchHandler}) if batched else None
+    yield from dispatch(_table(db), queries, batches=batches)
+
+
+def _table(db: Database | ShardedDatabase) -> dict:
+    return opcode_table({
+        "SET": lambda q: db.setHandler(q[1], q[2], q[3]),
+        "GET": lambda q: db.getHandler(q[1], q[2]),
+        "DELETE": lambda q: db.deleteHandler(q[1], q[2]),
+        "FIELDS": lambda q: db.fieldsHandler(q[1]),
+        "BEGIN": lambda q: db.beginHandler(),
+        "COMMIT": lambda q: db.commitHandler(),
+        "ROLLBACK": lambda q: db.rollbackHandler(),
+        "FIND": lambda q: db.findHandler(q[1], q[2]),
+    })
+
+
+def _shard_main(conn, indexes: tuple[str, ...]) -> None:
+    # Runs in a worker process: applies each batch of queries to its own keys.
+    db = Database(indexes)
+    table = _table(db)
+    serve(conn, lambda query: table[query[0]](query))
+
+
+class ShardedDatabase:
+    """Database whose keys are hash-partitioned across worker processes.
+
+    Every key lives on shard crc32(key) % workers, a full Database with its own
+    store and transaction layers. This coordinator owns the transaction depth:
+    BEGIN only counts, and a shard catches up with empty layers right before
+    its first write at the current depth, so shards nobody writes to never
+    hear about a transaction. COMMIT and ROLLBACK go to exactly the shards
+    that have a layer at that depth, which keeps every nested transaction
+    all-or-nothing across shards.
+
+    Writes are buffered per shard and shipped in batches (see
+    _workers.ShardPool); a read flushes its shard's buffer along with the
+    read, and FIND asks every shard and merges their sorted keys.
+    """
+
+    def __init__(self, workers: int, indexes: tuple[str, ...] = ()):
+        self.pool = ShardPool(_shard_main, workers, indexes)
+        self.shard_of: dict[str, int] = {}
+        self.depth = 0
+        self.shard_depth = [0] * workers
+
+    def setHandler(self, key, field, value):
+        shard = self._shard(key)
+        self._catch_up(shard)
+        self.pool.send(shard, ["SET", key, field, value])
+
+    def getHandler(self, key, field):
+        return self.pool.ask(self._shard(key), ["GET", key, field])
+
+    def deleteHandler(self, key, field):
+        shard = self._shard(key)
+        self._catch_up(shard)
+        return self.pool.ask(shard, ["DELETE", key, field])
+
+    def fieldsHandler(self, key):
+        return self.pool.ask(self._shard(key), ["FIELDS", key])
+
+    def findHandler(self, field, value):
+        found = self.pool.ask_all(["FIND", field, value])
+        return ",".join(heapq.merge(*(keys.split(",") for keys in found if keys)))
+
+    def beginHandler(self):
+        self.depth += 1
+
+    def commitHandler(self):
+        return self._end("COMMIT")
+
+    def rollbackHandler(self):
+        return self._end("ROLLBACK")
+
+    def close(self) -> None:
+        self.pool.close()
+
+    def _shard(self, key: str) -> int:
+        shard = self.shard_of.get(key)
+        if shard is None:
+            shard = self.shard_of[key] = zlib.crc32(key.encode()) % len(self.pool)
+        return shard
+
+    def _catch_up(self, shard: int) -> None:
+        # Empty layers change no reads, so they are only opened once the shard is written to.
+        for _ in range(self.depth - self.shard_depth[shard]):
+            self.pool.send(shard, ["BEGIN"])
+        self.shard_depth[shard] = self.depth
+
+    def _end(self, opcode: str) -> str:
+        if self.depth == 0:
+            return "false"
+        for shard, depth in enumerate(self.shard_depth):
+            if depth == self.depth:
+                self.pool.send(shard, [opcode])
+                self.shard_depth[shard] -= 1
+        self.depth -= 1
+        return "true"
+
+
+def _sharded_stream(queries: Iterable[list[str]], workers: int, indexes: tuple[str, ...]) -> Iterator[str]:
+    db = ShardedDatabase(workers, indexes)
+    try:
+        yield from dispatch(_table(db), queries)
+    finally:
+        db.close()
 
 
 if __name__ == "__main__":
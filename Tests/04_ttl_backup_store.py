@@ -56,11 +56,15 @@ Queries
      going forward).
    - Output: "true" if backup_index exists, else "false".
 
+8) ["COUNT", t]
+   - Output: the count of non-expired fields across all keys (at time t),
+     i.e. what BACKUP would report, without taking a snapshot.
+
 Return value
 ~~~~~~~~~~~~
 
 Return a list of outputs (strings) for each query that produces output:
-GET, DELETE, FIELDS, BACKUP, RESTORE (in order of occurrence).
+GET, DELETE, FIELDS, BACKUP, RESTORE, COUNT (in order of occurrence).
 
 Hint
 ~~~~
@@ -70,126 +74,598 @@ when combining BACKUP/RESTORE with time moving forward.
 
 from __future__ import annotations
 
-def solution(queries: list[list[str]]) -> list[str]:
-    # store[key][field] = (value, expiry_time_or_None)
-    store: dict[str, dict[str, tuple[str, int | None]]] = {}
-    backups: list[dict[str, dict[str, tuple[str, int | None]]]] = []
-    outputs: list[str] = []
-    current_time = 0
-
-    def is_expired(expiry: int | None, now: int) -> bool:
-        return expiry is not None and now >= expiry
-
-    def get_entry(key: str, field: str, now: int) -> tuple[str, int | None] | None:
-        """Return (value, expiry) if present and not expired; otherwise None. Also prunes expired entries."""
-        kd = store.get(key)
-        if not kd:
-            return None
-        entry = kd.get(field)
+import heapq
+import mmap
+import struct
+import tempfile
+import threading
+from bisect import bisect_left, insort
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, Iterator
+
+from _dispatch import dispatch, opcode_table
+
+try:
+    import numpy as np
+except ImportError:  # the batched GET path falls back to plain comparisons
+    np = None
+
+# NumPy only pays for its list conversions on long runs; shorter ones compare in Python.
+NUMPY_MIN_BATCH = 1024
+# Expiry used for fields without a TTL when comparing in int64.
+_NEVER = 2**63 - 1
+_NO_FIELDS: dict[str, tuple[str, int | None]] = {}
+
+Entry = tuple[str, "int | None"]
+Changes = dict[tuple[str, str], "Entry | None"]
+
+# Spilled record layout: u32 count, then per change a fixed header
+# (key_len, field_len, value_len, tag, expiry) followed by the utf-8 bytes.
+# tag 0 = deleted, 1 = no expiry, 2 = expiry is set.
+_COUNT = struct.Struct("<I")
+_CHANGE = struct.Struct("<IIIBq")
+
+
+def _encode_changes(changes: Changes) -> bytes:
+    parts = [_COUNT.pack(len(changes))]
+    for (key, field), entry in changes.items():
+        kb = key.encode()
+        fb = field.encode()
         if entry is None:
+            parts.append(_CHANGE.pack(len(kb), len(fb), 0, 0, 0) + kb + fb)
+            continue
+        value, expiry = entry
+        vb = value.encode()
+        tag = 1 if expiry is None else 2
+        parts.append(_CHANGE.pack(len(kb), len(fb), len(vb), tag, expiry or 0) + kb + fb + vb)
+    return b"".join(parts)
+
+
+def _decode_changes(buf: memoryview) -> Changes:
+    (count,) = _COUNT.unpack_from(buf, 0)
+    pos = _COUNT.size
+    changes: Changes = {}
+    for _ in range(count):
+        klen, flen, vlen, tag, expiry = _CHANGE.unpack_from(buf, pos)
+        pos += _CHANGE.size
+        key = str(buf[pos:pos + klen], "utf-8")
+        pos += klen
+        field = str(buf[pos:pos + flen], "utf-8")
+        pos += flen
+        if tag == 0:
+            changes[(key, field)] = None
+            continue
+        value = str(buf[pos:pos + vlen], "utf-8")
+        pos += vlen
+        changes[(key, field)] = (value, expiry if tag == 2 else None)
+    return changes
+
+
+class BackupLog:
+    """Backups kept as a chain of deltas over a base image.
+
+    Each backup records only the fields written since its parent (the previous
+    backup, or the backup last restored). Chains longer than `max_chain` are
+    folded into a fresh base image, optionally on a background thread. Once
+    more than `max_resident` backups are held in memory the oldest ones are
+    written to a temporary spill file and read back through mmap.
+    """
+
+    def __init__(self, *, max_chain: int = 32, max_resident: int | None = 256, background: bool = False):
+        self.max_chain = max_chain
+        self.max_resident = max_resident
+        self.parents: list[int] = []  # parent backup index, -1 for the empty store
+        self.depths: list[int] = []
+        self.deltas: list[Changes | None] = []  # None once spilled
+        self.spilled: dict[int, tuple[int, int]] = {}  # index -> (offset, length)
+        # Fields written since the live store last matched backup `base`.
+        self.dirty: set[tuple[str, str]] = set()
+        self.base = -1
+        self._next_spill = 0
+        self._lock = threading.Lock()
+        self._spill_file = None
+        self._spill_size = 0
+        self._map: mmap.mmap | None = None
+        self._executor = ThreadPoolExecutor(max_workers=1) if background else None
+
+    def __len__(self) -> int:
+        return len(self.parents)
+
+    def touch(self, key: str, field: str) -> None:
+        self.dirty.add((key, field))
+
+    def append(self, store: dict[str, dict[str, Entry]]) -> None:
+        changes: Changes = {}
+        for key, field in self.dirty:
+            changes[(key, field)] = store.get(key, {}).get(field)
+        with self._lock:
+            parent = self.base
+            depth = 0 if parent < 0 else self.depths[parent] + 1
+            idx = len(self.parents)
+            self.parents.append(parent)
+            self.depths.append(depth)
+            self.deltas.append(changes)
+        self.rebase(idx)
+
+        if depth > self.max_chain:
+            if self._executor is not None:
+                self._executor.submit(self.compact, idx)
+            else:
+                self.compact(idx)
+        if self.max_resident is not None:
+            while len(self.parents) - len(self.spilled) > self.max_resident:
+                self._spill(self._next_spill)
+                self._next_spill += 1
+
+    def rebase(self, idx: int) -> None:
+        """Record that the live store now equals backup `idx` exactly."""
+        self.dirty = set()
+        self.base = idx
+
+    def materialize(self, idx: int) -> dict[str, dict[str, Entry]]:
+        chain: list[Changes] = []
+        while idx >= 0:
+            with self._lock:
+                parent = self.parents[idx]
+                changes = self._read(idx)
+            chain.append(changes)
+            idx = parent
+
+        store: dict[str, dict[str, Entry]] = {}
+        for changes in reversed(chain):
+            for (key, field), entry in changes.items():
+                if entry is not None:
+                    store.setdefault(key, {})[field] = entry
+                elif key in store:
+                    store[key].pop(field, None)
+                    if not store[key]:
+                        del store[key]
+        return store
+
+    def compact(self, idx: int) -> None:
+        """Fold the delta chain under backup `idx` into a standalone base image."""
+        image = self.materialize(idx)
+        changes: Changes = {(key, field): entry for key, kd in image.items() for field, entry in kd.items()}
+        with self._lock:
+            self.parents[idx] = -1
+            self.depths[idx] = 0
+            if idx in self.spilled:
+                self.spilled[idx] = self._write(_encode_changes(changes))
+            else:
+                self.deltas[idx] = changes
+
+    def close(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        if self._spill_file is not None:
+            self._spill_file.close()
+            self._spill_file = None
+
+    def _spill(self, idx: int) -> None:
+        with self._lock:
+            changes = self.deltas[idx]
+            if changes is None:
+                return
+            self.spilled[idx] = self._write(_encode_changes(changes))
+            self.deltas[idx] = None
+
+    def _write(self, blob: bytes) -> tuple[int, int]:
+        if self._spill_file is None:
+            self._spill_file = tempfile.TemporaryFile(prefix="ttl_backups_")
+        offset = self._spill_size
+        self._spill_file.seek(offset)
+        self._spill_file.write(blob)
+        self._spill_size += len(blob)
+        return offset, len(blob)
+
+    def _read(self, idx: int) -> Changes:
+        changes = self.deltas[idx]
+        if changes is not None:
+            return changes
+        offset, length = self.spilled[idx]
+        if self._map is None or len(self._map) < offset + length:
+            if self._map is not None:
+                self._map.close()
+            self._spill_file.flush()
+            self._map = mmap.mmap(self._spill_file.fileno(), 0, access=mmap.ACCESS_READ)
+        return _decode_changes(memoryview(self._map)[offset:offset + length])
+
+
+class LRUPolicy:
+    """Evict the least recently written or read field."""
+
+    def __init__(self):
+        self.order: OrderedDict[tuple[str, str], None] = OrderedDict()
+
+    def touch(self, key: str, field: str) -> None:
+        self.order[(key, field)] = None
+        self.order.move_to_end((key, field))
+
+    def discard(self, key: str, field: str) -> None:
+        self.order.pop((key, field), None)
+
+    def victim(self, db: TTLStore) -> tuple[str, str] | None:
+        return next(iter(self.order), None)
+
+    def clear(self) -> None:
+        self.order.clear()
+
+
+class LFUPolicy:
+    """Evict the least frequently used field, oldest first among equal counts.
+
+    The non-empty frequency buckets form a linked list in increasing order
+    (node 0 is the sentinel), so a touch only ever links bucket n + 1 right
+    after bucket n and the least frequent bucket is always the head: touch,
+    discard and victim are O(1) even after removals empty the head.
+    """
+
+    def __init__(self):
+        self.freq: dict[tuple[str, str], int] = {}
+        # buckets[n] = fields used exactly n times, in order of reaching n
+        self.buckets: dict[int, OrderedDict[tuple[str, str], None]] = {}
+        self.next_freq: dict[int, int] = {0: 0}
+        self.prev_freq: dict[int, int] = {0: 0}
+
+    def touch(self, key: str, field: str) -> None:
+        item = (key, field)
+        n = self.freq.get(item, 0)
+        if n + 1 not in self.buckets:
+            self._link(n + 1, after=n)
+        self.buckets[n + 1][item] = None
+        self.freq[item] = n + 1
+        if n:
+            self._unlink(item, n)
+
+    def discard(self, key: str, field: str) -> None:
+        n = self.freq.pop((key, field), 0)
+        if n:
+            self._unlink((key, field), n)
+
+    def victim(self, db: TTLStore) -> tuple[str, str] | None:
+        head = self.next_freq[0]
+        if not head:
             return None
-        val, exp = entry
-        if is_expired(exp, now):
-            # prune expired
-            kd.pop(field, None)
-            if not kd:
-                store.pop(key, None)
+        return next(iter(self.buckets[head]))
+
+    def clear(self) -> None:
+        self.freq.clear()
+        self.buckets.clear()
+        self.next_freq = {0: 0}
+        self.prev_freq = {0: 0}
+
+    def _link(self, n: int, *, after: int) -> None:
+        following = self.next_freq[after]
+        self.buckets[n] = OrderedDict()
+        self.next_freq[after] = n
+        self.prev_freq[n] = after
+        self.next_freq[n] = following
+        self.prev_freq[following] = n
+
+    def _unlink(self, item: tuple[str, str], n: int) -> None:
+        bucket = self.buckets[n]
+        del bucket[item]
+        if not bucket:
+            del self.buckets[n]
+            before = self.prev_freq.pop(n)
+            after = self.next_freq.pop(n)
+            self.next_freq[before] = after
+            self.prev_freq[after] = before
+
+
+class VolatileTTLPolicy:
+    """Evict the field closest to expiry; fields without a TTL go last, oldest key first."""
+
+    def touch(self, key: str, field: str) -> None:
+        pass
+
+    def discard(self, key: str, field: str) -> None:
+        pass
+
+    def victim(self, db: TTLStore) -> tuple[str, str] | None:
+        soonest = db.peek_expiry()
+        if soonest is not None:
+            return soonest
+        key = next(iter(db.store), None)
+        if key is None:
             return None
-        return entry
-
-    def prune_key(key: str, now: int) -> None:
-        """Remove expired fields for a key (in-place)."""
-        kd = store.get(key)
-        if not kd:
+        return key, next(iter(db.store[key]))
+
+    def clear(self) -> None:
+        pass
+
+
+EVICTION_POLICIES = {"lru": LRUPolicy, "lfu": LFUPolicy, "volatile-ttl": VolatileTTLPolicy}
+
+
+def _entry_size(key: str, field: str, value: str) -> int:
+    return len(key) + len(field) + len(value)
+
+
+class TTLStore:
+    def __init__(
+        self,
+        backups: BackupLog | None = None,
+        *,
+        max_fields: int | None = None,
+        max_bytes: int | None = None,
+        policy: str = "lru",
+    ):
+        # store[key][field] = (value, expiry_time_or_None)
+        self.store: dict[str, dict[str, tuple[str, int | None]]] = {}
+        self.backups = backups if backups is not None else BackupLog()
+        # Optional memory ceiling; sizes are measured as len(key) + len(field) + len(value).
+        # The ceiling is hard: a write that would not fit even in an empty store is
+        # refused, leaving any previous value in place, and counted in stats["rejected"].
+        self.max_fields = max_fields
+        self.max_bytes = max_bytes
+        self.used_bytes = 0
+        if max_fields is None and max_bytes is None:
+            self.policy = None
+        elif policy in EVICTION_POLICIES:
+            self.policy = EVICTION_POLICIES[policy]()
+        else:
+            raise ValueError(f"Unknown eviction policy: {policy!r}")
+        self.stats = {"evictions": 0, "evicted_bytes": 0, "expirations": 0, "rejected": 0}
+        # field_index[key] = live field names of key in sorted order; mirrors store[key].
+        self.field_index: dict[str, list[str]] = {}
+        self.current_time = 0
+        # Number of live fields across all keys, kept in step with every insert/removal.
+        self.live_fields = 0
+        # Min-heap of (expiry, key, field). Overwrites leave stale entries behind;
+        # they are skipped on pop because the live entry no longer carries that expiry.
+        self.expiry_heap: list[tuple[int, str, str]] = []
+        self.stale_heap_entries = 0
+
+    def advance(self, now: int) -> None:
+        """Move the clock to `now` and evict every field whose expiry has been reached."""
+        self.current_time = now
+        # Rebuild once stale entries dominate so long-lived TTLs that are
+        # rewritten over and over cannot grow the heap without bound.
+        if self.stale_heap_entries > 64 and self.stale_heap_entries * 2 > len(self.expiry_heap):
+            self._rebuild_heap()
+        heap = self.expiry_heap
+        while heap and heap[0][0] <= now:
+            expiry, key, field = heapq.heappop(heap)
+            entry = self.store.get(key, {}).get(field)
+            if entry is None or entry[1] != expiry:
+                self.stale_heap_entries -= 1
+                continue  # stale: overwritten or deleted since it was pushed
+            self._remove(key, field, popped=True)
+            self.stats["expirations"] += 1
+
+    def peek_expiry(self) -> tuple[str, str] | None:
+        """Return the live field with the earliest expiry without removing it."""
+        heap = self.expiry_heap
+        while heap:
+            expiry, key, field = heap[0]
+            entry = self.store.get(key, {}).get(field)
+            if entry is not None and entry[1] == expiry:
+                return key, field
+            heapq.heappop(heap)
+            self.stale_heap_entries -= 1
+        return None
+
+    def setHandler(self, key, field, value):
+        self._put(key, field, (value, None))
+
+    def setTtlHandler(self, key, field, value, ttl):
+        expiry = self.current_time + ttl
+        if not self._put(key, field, (value, expiry)):
             return
-        expired_fields = [f for f, (_, exp) in kd.items() if is_expired(exp, now)]
-        for f in expired_fields:
-            kd.pop(f, None)
-        if not kd:
-            store.pop(key, None)
-
-    for q in queries:
-        op = q[0]
-        t = int(q[1])
-        current_time = t
-
-        if op == "SET":
-            _, _, key, field, value = q
-            store.setdefault(key, {})[field] = (value, None)
-
-        elif op == "SET_TTL":
-            _, _, key, field, value, ttl_s = q
-            expiry = current_time + int(ttl_s)
-            store.setdefault(key, {})[field] = (value, expiry)
-
-        elif op == "GET":
-            _, _, key, field = q
-            entry = get_entry(key, field, current_time)
-            outputs.append("" if entry is None else entry[0])
-
-        elif op == "DELETE":
-            _, _, key, field = q
-            entry = get_entry(key, field, current_time)
-            if entry is None:
-                outputs.append("false")
-            else:
-                # delete (guaranteed not expired)
-                store[key].pop(field, None)
-                if not store[key]:
-                    store.pop(key, None)
-                outputs.append("true")
-
-        elif op == "FIELDS":
-            _, _, key = q
-            prune_key(key, current_time)
-            kd = store.get(key)
-            if not kd:
-                outputs.append("")
-            else:
-                items = sorted(((f, v) for f, (v, exp) in kd.items() if not is_expired(exp, current_time)),
-                               key=lambda x: x[0])
-                outputs.append("" if not items else ",".join(f"{f}={v}" for f, v in items))
-
-        elif op == "BACKUP":
-            # Snapshot includes only non-expired fields at time t
-            snapshot: dict[str, dict[str, tuple[str, int | None]]] = {}
-            count = 0
-            # prune expired globally as we walk, to keep store tidy (optional but helpful)
-            keys_to_delete: list[str] = []
-            for key, kd in store.items():
-                new_kd: dict[str, tuple[str, int | None]] = {}
-                for field, (val, exp) in kd.items():
-                    if not is_expired(exp, current_time):
-                        new_kd[field] = (val, exp)
-                if new_kd:
-                    snapshot[key] = new_kd
-                    count += len(new_kd)
-                # track keys that became empty due to expiry
-                if not new_kd:
-                    keys_to_delete.append(key)
-            # prune expired-only keys from live store (optional but consistent)
-            for key in keys_to_delete:
-                # may still have non-expired fields if store changed mid-loop (it won't), but be safe:
-                prune_key(key, current_time)
-
-            backups.append(snapshot)
-            outputs.append(str(count))
-
-        elif op == "RESTORE":
-            _, _, idx_s = q
-            idx = int(idx_s)
-            if idx < 0 or idx >= len(backups):
-                outputs.append("false")
-            else:
-                # Deep copy snapshot back into store
-                snap = backups[idx]
-                store = {k: {f: (v, exp) for f, (v, exp) in fields.items()} for k, fields in snap.items()}
-                outputs.append("true")
+        heapq.heappush(self.expiry_heap, (expiry, key, field))
+        if ttl <= 0:
+            self.advance(self.current_time)
 
+    def getHandler(self, key, field):
+        entry = self.store.get(key, {}).get(field)
+        if entry is None:
+            return ""
+        if self.policy is not None:
+            self.policy.touch(key, field)
+        return entry[0]
+
+    def getBatchHandler(self, queries):
+        """Answer a run of GET queries without advancing the clock between them.
+
+        Nothing is written during the run, so each GET only compares the
+        field's expiry with its own timestamp; the caller then advances the
+        clock to the run's last timestamp, evicting what expired meanwhile.
+        """
+        store = self.store
+        entries = [store.get(q[2], _NO_FIELDS).get(q[3]) for q in queries]
+        if np is not None and len(queries) >= NUMPY_MIN_BATCH:
+            times = np.fromiter((int(q[1]) for q in queries), dtype=np.int64, count=len(queries))
+            expiries = np.fromiter(
+                (_NEVER if entry is None or entry[1] is None else entry[1] for entry in entries),
+                dtype=np.int64,
+                count=len(entries),
+            )
+            live = (expiries > times).tolist()
         else:
-            raise ValueError(f"Unknown op: {op!r}")
+            live = [
+                entry is not None and (entry[1] is None or entry[1] > int(q[1])) for q, entry in zip(queries, entries)
+            ]
 
-    return outputs
+        outputs = []
+        for q, entry, alive in zip(queries, entries, live):
+            if entry is None or not alive:
+                outputs.append("")
+                continue
+            if self.policy is not None:
+                self.policy.touch(q[2], q[3])
+            outputs.append(entry[0])
+        return outputs
+
+    def deleteHandler(self, key, field):
+        if field not in self.store.get(key, {}):
+            return "false"
+        self._remove(key, field)
+        return "true"
+
+    def fieldsHandler(self, key):
+        kd = self.store.get(key)
+        if not kd:
+            return ""
+        if self.policy is not None:
+            for field in kd:
+                self.policy.touch(key, field)
+        return ",".join(f"{field}={kd[field][0]}" for field in self.field_index[key])
+
+    def backupHandler(self):
+        # Expired fields were already evicted by advance(), so the live store is the snapshot.
+        self.backups.append(self.store)
+        return str(self.live_fields)
+
+    def countHandler(self):
+        return str(self.live_fields)
+
+    def restoreHandler(self, idx):
+        if idx < 0 or idx >= len(self.backups):
+            return "false"
+        self.store = self.backups.materialize(idx)
+        self.backups.rebase(idx)
+        self.field_index = {key: sorted(kd) for key, kd in self.store.items()}
+        self.live_fields = sum(len(kd) for kd in self.store.values())
+        self.used_bytes = sum(
+            _entry_size(key, field, value) for key, kd in self.store.items() for field, (value, _) in kd.items()
+        )
+        self._rebuild_heap()
+        if self.policy is not None:
+            self.policy.clear()
+            for key, kd in self.store.items():
+                for field in kd:
+                    self.policy.touch(key, field)
+        # The snapshot may hold fields that have expired by the restore time.
+        self.advance(self.current_time)
+        self._enforce_budget()
+        return "true"
+
+    def _put(self, key: str, field: str, entry: tuple[str, int | None]) -> bool:
+        """Store key.field = entry; return False if the budget refused the write."""
+        if self.policy is not None and not self._make_room(key, field, _entry_size(key, field, entry[0])):
+            self.stats["rejected"] += 1
+            return False
+        kd = self.store.setdefault(key, {})
+        old = kd.get(field)
+        kd[field] = entry
+        self.backups.touch(key, field)
+        self.used_bytes += _entry_size(key, field, entry[0])
+        if old is None:
+            self.live_fields += 1
+            insort(self.field_index.setdefault(key, []), field)
+        else:
+            self.used_bytes -= _entry_size(key, field, old[0])
+            if old[1] is not None:
+                self.stale_heap_entries += 1
+        if self.policy is not None:
+            self.policy.touch(key, field)
+        return True
+
+    def _remove(self, key: str, field: str, *, popped: bool = False) -> None:
+        kd = self.store[key]
+        value, expiry = kd.pop(field)
+        self.live_fields -= 1
+        self.used_bytes -= _entry_size(key, field, value)
+        self.backups.touch(key, field)
+        if self.policy is not None:
+            self.policy.discard(key, field)
+        if not kd:
+            del self.store[key]
+            del self.field_index[key]
+        else:
+            names = self.field_index[key]
+            del names[bisect_left(names, field)]
+        if expiry is not None and not popped:
+            self.stale_heap_entries += 1
+
+    def _make_room(self, key: str, field: str, size: int) -> bool:
+        """Evict until writing key.field with an entry of `size` bytes stays within budget.
+
+        Returns False, without evicting anything, if the entry alone exceeds the budget.
+        """
+        if self._over_budget(1, size):
+            return False
+        while True:
+            old = self.store.get(key, {}).get(field)
+            fields = self.live_fields + (old is None)
+            used = self.used_bytes + size - (0 if old is None else _entry_size(key, field, old[0]))
+            if not self._over_budget(fields, used):
+                return True
+            if not self._evict_one():
+                return False
+
+    def _enforce_budget(self) -> None:
+        if self.policy is None:
+            return
+        while self._over_budget(self.live_fields, self.used_bytes) and self._evict_one():
+            pass
+
+    def _over_budget(self, fields: int, used: int) -> bool:
+        return (self.max_fields is not None and fields > self.max_fields) or (
+            self.max_bytes is not None and used > self.max_bytes
+        )
+
+    def _evict_one(self) -> bool:
+        victim = self.policy.victim(self)
+        if victim is None:
+            return False
+        key, field = victim
+        self.stats["evictions"] += 1
+        self.stats["evicted_bytes"] += _entry_size(key, field, self.store[key][field][0])
+        self._remove(key, field)
+        return True
+
+    def _rebuild_heap(self) -> None:
+        self.expiry_heap = [
+            (exp, key, field)
+            for key, kd in self.store.items()
+            for field, (_, exp) in kd.items()
+            if exp is not None
+        ]
+        heapq.heapify(self.expiry_heap)
+        self.stale_heap_entries = 0
+
+
+def solution(queries: list[list[str]], db: TTLStore | None = None, *, batched: bool = False) -> list[str]:
+    return list(stream(queries, db, batched=batched))
+
+
+def stream(queries: Iterable[list[str]], db: TTLStore | None = None, *, batched: bool = False) -> Iterator[str]:
+    """Like solution(), but yields each output as soon as its query is processed.
+
+    With batched=True, a run of consecutive GET queries is answered by
+    TTLStore.getBatchHandler(); the run's outputs are yielded when the run ends.
+    A store passed in by the caller stays open for further calls; closing its
+    BackupLog is then up to the caller.
+    """
+    owned = db is None
+    if owned:
+        db = TTLStore()
+    try:
+        yield from _run(db, queries, batched)
+    finally:
+        if owned:
+            db.backups.close()
+
+
+def _run(db: TTLStore, queries: Iterable[list[str]], batched: bool = False) -> Iterator[str]:
+    table = opcode_table({
+        "SET": lambda q: db.setHandler(q[2], q[3], q[4]),
+        "SET_TTL": lambda q: db.setTtlHandler(q[2], q[3], q[4], int(q[5])),
+        "GET": lambda q: db.getHandler(q[2], q[3]),
+        "DELETE": lambda q: db.deleteHandler(q[2], q[3]),
+        "FIELDS": lambda q: db.fieldsHandler(q[2]),
+        "BACKUP": lambda q: db.backupHandler(),
+        "RESTORE": lambda q: db.restoreHandler(int(q[2])),
+        "COUNT": lambda q: db.countHandler(),
+    })
+    batches = opcode_table({"GET": db.getBatchHandler}) if batched else None
+    return dispatch(table, queries, clock=db.advance, batches=batches)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,97 @@
+"""
+Worker processes shared by the sharded engines (ShardedScoreboard, ShardedDatabase).
+
+A ShardPool starts one process per shard and talks to each over its own pipe.
+Requests are buffered per shard and shipped in batches; the worker side runs
+serve(), which applies a batch in order and, if the batch asked for a reply,
+sends back the result of its last request:
+
+    def _shard_main(conn) -> None:
+        state = ...
+        serve(conn, lambda request: ...)
+
+    pool = ShardPool(_shard_main, workers)
+    pool.send(shard, request)         # no reply needed; shipped when the buffer fills
+    result = pool.ask(shard, request)  # flushes that shard and waits
+    results = pool.ask_all(request)    # every shard works on it at once
+
+The target must be a module-level function: under the spawn start method it
+is pickled by name, so its module must be importable (see
+Verification/_harness.py).
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+from typing import Any, Callable
+
+
+def serve(conn, handle: Callable[[Any], Any]) -> None:
+    """Worker-process loop: apply every batch received on `conn` until the pool closes it."""
+    while True:
+        batch, reply = conn.recv()
+        if batch is None:
+            conn.close()
+            return
+        result = None
+        for request in batch:
+            result = handle(request)
+        if reply:
+            conn.send(result)
+
+
+class ShardPool:
+    # Requests buffered per shard before a batch is shipped without waiting for a read.
+    batch_size = 4096
+
+    def __init__(self, target: Callable[..., None], workers: int, *args: Any):
+        # fork starts workers fastest; spawn (e.g. on Windows) needs `target` to pickle by name.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        self.conns = []
+        self.processes = []
+        for _ in range(workers):
+            parent_conn, child_conn = context.Pipe()
+            process = context.Process(target=target, args=(child_conn, *args), daemon=True)
+            process.start()
+            child_conn.close()
+            self.conns.append(parent_conn)
+            self.processes.append(process)
+        self.pending: list[list[Any]] = [[] for _ in range(workers)]
+
+    def __len__(self) -> int:
+        return len(self.conns)
+
+    def send(self, shard: int, request: Any) -> None:
+        pending = self.pending[shard]
+        pending.append(request)
+        if len(pending) >= self.batch_size:
+            self._ship(shard)
+
+    def ask(self, shard: int, request: Any) -> Any:
+        self.pending[shard].append(request)
+        self._ship(shard, reply=True)
+        return self.conns[shard].recv()
+
+    def ask_all(self, request: Any) -> list[Any]:
+        for shard in range(len(self.conns)):
+            self.pending[shard].append(request)
+            self._ship(shard, reply=True)
+        return [conn.recv() for conn in self.conns]
+
+    def flush(self) -> None:
+        for shard, pending in enumerate(self.pending):
+            if pending:
+                self._ship(shard)
+
+    def close(self) -> None:
+        self.flush()
+        for conn in self.conns:
+            conn.send((None, False))
+            conn.close()
+        for process in self.processes:
+            process.join()
+
+    def _ship(self, shard: int, *, reply: bool = False) -> None:
+        self.conns[shard].send((self.pending[shard], reply))
+        self.pending[shard] = []
@@ -0,0 +1,199 @@
+"""Pre-generated query corpora stored in a compact binary file and read through mmap.
+
+Layout (little-endian, every section 8-byte aligned):
+
+    magic            8 bytes  b"QCORPUS1"
+    header           u32 string_count, u32 case_count, u64 query_count, u64 token_count
+    string offsets   u32[string_count + 1] into the string bytes
+    string bytes     utf-8, concatenated
+    case starts      u64[case_count + 1]   first query of each case
+    query starts     u64[query_count + 1]  first token of each query
+    tokens           u32[token_count]      string ids
+
+Every distinct string is stored once and decoded once per load, so the tokens
+of a loaded case are shared, interned str objects. Cases are immutable: each
+access builds a fresh list, so an oracle and a candidate can read the same
+case without copying it first.
+"""
+
+from __future__ import annotations
+
+import hashlib
+import mmap
+import struct
+import sys
+from array import array
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, Sequence
+
+MAGIC = b"QCORPUS1"
+_HEADER = struct.Struct("<IIQQ")
+
+
+def _pad(n: int) -> int:
+    return -n % 8
+
+
+def _le(arr: array) -> bytes:
+    if sys.byteorder != "little":
+        arr = array(arr.typecode, arr)
+        arr.byteswap()
+    return arr.tobytes()
+
+
+def write_corpus(path: Path, cases: Iterable[list[list[str]]]) -> None:
+    ids: dict[str, int] = {}
+    case_starts = array("Q", [0])
+    query_starts = array("Q", [0])
+    tokens = array("I")
+    for case in cases:
+        for query in case:
+            for token in query:
+                token_id = ids.get(token)
+                if token_id is None:
+                    token_id = ids[token] = len(ids)
+                tokens.append(token_id)
+            query_starts.append(len(tokens))
+        case_starts.append(len(query_starts) - 1)
+
+    encoded = [s.encode() for s in ids]
+    string_offsets = array("I", [0])
+    for blob in encoded:
+        string_offsets.append(string_offsets[-1] + len(blob))
+    string_bytes = b"".join(encoded)
+
+    sections = [
+        MAGIC,
+        _HEADER.pack(len(encoded), len(case_starts) - 1, len(query_starts) - 1, len(tokens)),
+        _le(string_offsets),
+        string_bytes,
+        _le(case_starts),
+        _le(query_starts),
+        _le(tokens),
+    ]
+    tmp = path.with_suffix(path.suffix + ".tmp")
+    with open(tmp, "wb") as f:
+        for section in sections:
+            f.write(section)
+            f.write(b"\0" * _pad(len(section)))
+    tmp.replace(path)
+
+
+class Corpus(Sequence["CorpusCase"]):
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        with open(self.path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        view = memoryview(self._map)
+        if bytes(view[:8]) != MAGIC:
+            raise ValueError(f"{self.path} is not a query corpus")
+        string_count, case_count, query_count, token_count = _HEADER.unpack_from(view, 8)
+        pos = 8 + _HEADER.size
+        pos += _pad(pos)
+
+        def take(length: int) -> memoryview:
+            nonlocal pos
+            section = view[pos:pos + length]
+            pos += length + _pad(length)
+            return section
+
+        string_offsets = self._ints(take(4 * (string_count + 1)), "I")
+        string_bytes = take(string_offsets[-1])
+        self.strings = [
+            sys.intern(str(string_bytes[string_offsets[i]:string_offsets[i + 1]], "utf-8"))
+            for i in range(string_count)
+        ]
+        self.case_starts = self._ints(take(8 * (case_count + 1)), "Q")
+        self.query_starts = self._ints(take(8 * (query_count + 1)), "Q")
+        self.tokens = self._ints(take(4 * token_count), "I")
+
+    @staticmethod
+    def _ints(section: memoryview, typecode: str) -> Sequence[int]:
+        if sys.byteorder == "little" and array(typecode).itemsize == {"I": 4, "Q": 8}[typecode]:
+            return section.cast(typecode)  # zero-copy view over the mapped file
+        arr = array(typecode, bytes(section))
+        if sys.byteorder != "little":
+            arr.byteswap()
+        return arr
+
+    def __len__(self) -> int:
+        return len(self.case_starts) - 1
+
+    def __getitem__(self, index):  # type: ignore[override]
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError(index)
+        return CorpusCase(self, index)
+
+
+class CorpusCase(Sequence[list[str]]):
+    """One case of a Corpus; each query is decoded into a new list on access."""
+
+    def __init__(self, corpus: Corpus, index: int):
+        self.corpus = corpus
+        self.index = index
+        self._first = corpus.case_starts[index]
+        self._last = corpus.case_starts[index + 1]
+
+    def __len__(self) -> int:
+        return self._last - self._first
+
+    def __getitem__(self, i):  # type: ignore[override]
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        if i < 0:
+            i += len(self)
+        if not 0 <= i < len(self):
+            raise IndexError(i)
+        starts = self.corpus.query_starts
+        q = self._first + i
+        strings = self.corpus.strings
+        return [strings[t] for t in self.corpus.tokens[starts[q]:starts[q + 1]]]
+
+    def __iter__(self) -> Iterator[list[str]]:
+        strings = self.corpus.strings
+        tokens = self.corpus.tokens
+        starts = self.corpus.query_starts
+        begin = starts[self._first]
+        for q in range(self._first + 1, self._last + 1):
+            end = starts[q]
+            yield [strings[t] for t in tokens[begin:end]]
+            begin = end
+
+    def __reduce__(self):
+        # mmap objects cannot be pickled; worker processes reopen the file instead.
+        return _open_case, (str(self.corpus.path), self.index)
+
+
+_open_corpora: dict[str, Corpus] = {}
+
+
+def open_corpus(path: Path) -> Corpus:
+    key = str(Path(path).resolve())
+    corpus = _open_corpora.get(key)
+    if corpus is None:
+        corpus = _open_corpora[key] = Corpus(Path(key))
+    return corpus
+
+
+def _open_case(path: str, index: int) -> CorpusCase:
+    return open_corpus(Path(path))[index]
+
+
+def cached_corpus(
+    corpus_dir: Path, name: str, build: Callable[[], Iterable[list[list[str]]]], *, version: str = ""
+) -> Corpus:
+    """Load corpus_dir/<name>-<digest>.qcorpus, generating it with build() on first use.
+
+    `version` feeds the digest, so callers can pass the source of their
+    generator and get a fresh corpus whenever it changes.
+    """
+    digest = hashlib.sha1(version.encode()).hexdigest()[:12]
+    path = Path(corpus_dir) / f"{name}-{digest}.qcorpus"
+    if not path.exists():
+        path.parent.mkdir(parents=True, exist_ok=True)
+        write_corpus(path, build())
+    return open_corpus(path)
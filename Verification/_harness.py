@@ -1,9 +1,19 @@
 from __future__ import annotations
 
+import argparse
 import importlib.util
+import math
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from copy import deepcopy
+from dataclasses import dataclass
 from pathlib import Path
 from types import ModuleType
-from typing import Callable, TypeVar
+from typing import Callable, Iterator, Sequence, TypeVar
+
+from _corpus import CorpusCase, cached_corpus
 
 T = TypeVar("T")
 
@@ -14,28 +24,116 @@ def repo_root() -> Path:
 
 def load_module_from_path(path: Path) -> ModuleType:
     path = path.resolve()
+    # Solutions import shared helpers (e.g. Tests/_dispatch.py) from their own directory.
+    if str(path.parent) not in sys.path:
+        sys.path.append(str(path.parent))
     spec = importlib.util.spec_from_file_location(path.stem, path)
     if spec is None or spec.loader is None:
         raise RuntimeError(f"Unable to import module from path: {path}")
 
     module = importlib.util.module_from_spec(spec)
+    # Registered under its stem so pickle can find module-level functions by name,
+    # e.g. a worker process target started with the spawn method.
+    sys.modules[path.stem] = module
     spec.loader.exec_module(module)
     return module
 
 
+@dataclass
+class LoaderStats:
+    loads: int = 0
+    hits: int = 0
+    load_seconds: float = 0.0
+
+
+LOADER_STATS = LoaderStats()
+_module_cache: dict[Path, tuple[tuple[int, int], ModuleType]] = {}
+
+
+def load_module_cached(path: Path) -> ModuleType:
+    """Like load_module_from_path(), but reuses the module while the file's mtime and size are unchanged."""
+    path = path.resolve()
+    stat = path.stat()
+    version = (stat.st_mtime_ns, stat.st_size)
+    cached = _module_cache.get(path)
+    if cached is not None and cached[0] == version:
+        LOADER_STATS.hits += 1
+        return cached[1]
+
+    started = time.perf_counter()
+    module = load_module_from_path(path)
+    LOADER_STATS.load_seconds += time.perf_counter() - started
+    LOADER_STATS.loads += 1
+    _module_cache[path] = (version, module)
+    return module
+
+
 def load_solution(test_filename: str) -> Callable[[list[list[str]]], list[str]]:
     tests_dir = repo_root() / "Tests"
     path = tests_dir / test_filename
     if not path.exists():
         raise FileNotFoundError(f"Missing test file: {path}")
 
-    module = load_module_from_path(path)
+    module = load_module_cached(path)
     sol = getattr(module, "solution", None)
     if not callable(sol):
         raise TypeError(f"{path} must define a callable solution(queries) function")
     return sol
 
 
+class SolutionRef:
+    """A picklable handle to Tests/<test_filename>'s solution(), loaded lazily in each process.
+
+    Keyword `options` are passed on every call, e.g. SolutionRef("01_contest_scoreboard.py", batched=True).
+    """
+
+    def __init__(self, test_filename: str, **options: object):
+        self.test_filename = test_filename
+        self.options = options
+        self._solution: Callable[..., list[str]] | None = None
+
+    def load(self) -> Callable[..., list[str]]:
+        if self._solution is None:
+            self._solution = load_solution(self.test_filename)
+        return self._solution
+
+    def __call__(self, queries: list[list[str]]) -> list[str]:
+        return self.load()(queries, **self.options)
+
+    def __getstate__(self) -> dict:
+        return {"test_filename": self.test_filename, "options": self.options, "_solution": None}
+
+
+def parse_args(argv: list[str] | None = None) -> argparse.Namespace:
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--complexity",
+        action="store_true",
+        help="also time the solution at n, 2n, 4n, 8n and check its growth against COMPLEXITY_BUDGET",
+    )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="shard the case list across this many worker processes (case i goes to shard i %% workers)",
+    )
+    parser.add_argument("--timings", action="store_true", help="print the time taken by every case")
+    parser.add_argument(
+        "--scale",
+        type=int,
+        nargs="+",
+        default=[],
+        metavar="N",
+        help="also check the solution against the fast oracle on scaled_case() inputs of N queries",
+    )
+    parser.add_argument(
+        "--corpus",
+        type=Path,
+        help="directory for pre-generated random cases; built on first use, then loaded via mmap",
+    )
+    return parser.parse_args(argv)
+
+
 def assert_is_list_of_str(value: object, *, context: str) -> None:
     if not isinstance(value, list) or not all(isinstance(x, str) for x in value):
         raise AssertionError(f"{context}: expected list[str], got {type(value).__name__}: {value!r}")
@@ -58,3 +156,260 @@ def run_solution(
         raise AssertionError(f"{context}: solution() is not implemented") from e
     except Exception as e:  # pragma: no cover
         raise AssertionError(f"{context}: solution() raised {type(e).__name__}: {e}") from e
+
+
+# Log-log slope budgets for check_complexity(); a little headroom over the ideal exponent absorbs timer noise.
+NEAR_LINEAR = 1.3
+SUPERLINEAR = 1.6
+QUADRATIC = 2.3
+
+
+def fit_loglog_slope(points: list[tuple[int, float]]) -> float:
+    """Least-squares slope of log(seconds) against log(n)."""
+    xs = [math.log(n) for n, _ in points]
+    ys = [math.log(max(seconds, 1e-9)) for _, seconds in points]
+    mean_x = sum(xs) / len(xs)
+    mean_y = sum(ys) / len(ys)
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if var_x == 0:
+        raise ValueError("need at least two distinct input sizes to fit a slope")
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+def check_complexity(
+    solution: Callable[[list[list[str]]], list[str]],
+    make_case: Callable[[int], list[list[str]]],
+    *,
+    budget: float,
+    context: str,
+    base_n: int = 4000,
+    factors: tuple[int, ...] = (1, 2, 4, 8),
+    repeats: int = 3,
+) -> float:
+    """Time `solution` at base_n * factors and fail if runtime grows faster than n**budget."""
+    points: list[tuple[int, float]] = []
+    for factor in factors:
+        queries = make_case(base_n * factor)
+        best = math.inf
+        for _ in range(repeats):
+            started = time.perf_counter()
+            run_solution(solution, queries, context=context)
+            best = min(best, time.perf_counter() - started)
+        points.append((len(queries), best))
+
+    slope = fit_loglog_slope(points)
+    if slope > budget:
+        timings = ", ".join(f"n={n}: {seconds * 1000:.1f} ms" for n, seconds in points)
+        raise AssertionError(
+            f"{context}: runtime grows like n^{slope:.2f}, over the budget of n^{budget:.2f}\n  {timings}"
+        )
+    return slope
+
+
+@dataclass
+class CaseResult:
+    index: int  # 1-based, matching the "case N" contexts
+    seconds: float
+    error: str | None = None
+
+
+Candidates = dict[str, Callable[[list[list[str]]], list[str]]]
+
+
+def load_cases(
+    name: str,
+    build: Callable[[], list[list[list[str]]]],
+    *,
+    corpus_dir: Path | None,
+    source: Callable | None = None,
+) -> Sequence[Sequence[list[str]]]:
+    """Return build()'s cases, or their stored copy from corpus_dir when one is given.
+
+    The corpus is keyed on the source file of `source` (default: `build`), so
+    editing a generator produces a fresh corpus instead of reusing a stale one.
+    """
+    if corpus_dir is None:
+        return build()
+    version = Path((source or build).__code__.co_filename).read_text()
+    return cached_corpus(corpus_dir, name, build, version=version)
+
+
+def load_scaled_cases(
+    name: str,
+    make_case: Callable[[random.Random, int], list[list[str]]],
+    sizes: list[int],
+    *,
+    corpus_dir: Path | None,
+) -> list[Sequence[list[str]]]:
+    """One make_case(Random(n), n) case per size, through the corpus when one is given."""
+    cases: list[Sequence[list[str]]] = []
+    for n in sizes:
+        def build(n: int = n) -> list[list[list[str]]]:
+            return [make_case(random.Random(n), n)]
+
+        cases.extend(load_cases(f"{name}-scale-{n}", build, corpus_dir=corpus_dir, source=make_case))
+    return cases
+
+
+def _fresh(queries: Sequence[list[str]]) -> Sequence[list[str]]:
+    # Corpus cases hand out new lists on every access, so only plain lists need copying.
+    return queries if isinstance(queries, CorpusCase) else deepcopy(queries)
+
+
+def _check_case(
+    index: int, queries: Sequence[list[str]], oracle: Callable[[list[list[str]]], list[str]], candidates: Candidates
+) -> CaseResult:
+    started = time.perf_counter()
+    try:
+        expected = oracle(_fresh(queries))
+        for label, candidate in candidates.items():
+            context = f"case {index}" if not label else f"case {index} ({label})"
+            got = run_solution(candidate, _fresh(queries), context=context)
+            if not label:
+                assert_is_list_of_str(got, context=f"case {index}: return type")
+            assert_equal(got, expected, context=context)
+    except AssertionError as e:
+        return CaseResult(index, time.perf_counter() - started, str(e))
+    return CaseResult(index, time.perf_counter() - started)
+
+
+def _check_shard(
+    shard: list[tuple[int, Sequence[list[str]]]],
+    oracle: Callable[[list[list[str]]], list[str]],
+    candidates: Candidates,
+) -> list[CaseResult]:
+    # Import the solutions up front so the first case's timing does not include it.
+    for candidate in candidates.values():
+        if isinstance(candidate, SolutionRef):
+            candidate.load()
+    return [_check_case(index, queries, oracle, candidates) for index, queries in shard]
+
+
+def run_cases(
+    cases: Sequence[Sequence[list[str]]],
+    oracle: Callable[[list[list[str]]], list[str]],
+    candidates: Candidates,
+    *,
+    workers: int = 1,
+    first_index: int = 1,
+) -> list[CaseResult]:
+    """Compare every candidate against the oracle on every case.
+
+    With workers > 1 the cases are dealt round-robin onto that many processes;
+    oracle and candidates must then be picklable (module-level functions or
+    SolutionRef). Results come back in case order, and the first failing case
+    is raised as an AssertionError, so the output does not depend on scheduling.
+    """
+    indexed = list(enumerate(cases, start=first_index))
+    if workers <= 1:
+        results = _check_shard(indexed, oracle, candidates)
+    else:
+        shards = [indexed[i::workers] for i in range(workers)]
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            futures = [pool.submit(_check_shard, shard, oracle, candidates) for shard in shards if shard]
+            results = [result for future in futures for result in future.result()]
+        results.sort(key=lambda r: r.index)
+
+    for result in results:
+        if result.error is not None:
+            raise AssertionError(result.error)
+    return results
+
+
+def format_timings(results: list[CaseResult]) -> str:
+    total = sum(r.seconds for r in results)
+    slowest = max(results, key=lambda r: r.seconds)
+    return f"{len(results)} cases in {total * 1000:.1f} ms, slowest case {slowest.index} ({slowest.seconds * 1000:.1f} ms)"
+
+
+def format_case_timings(results: list[CaseResult]) -> str:
+    return "\n".join(f"  case {r.index}: {r.seconds * 1000:.2f} ms" for r in results)
+
+
+class OpStats:
+    """Count, total and a log-scale latency histogram for one query type.
+
+    Buckets split each power of two of nanoseconds into four, so percentiles
+    are reported to within about 19% while memory stays constant.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.total_ns = 0
+        self.max_ns = 0
+        self.buckets: dict[int, int] = {}
+
+    def record(self, ns: int) -> None:
+        self.count += 1
+        self.total_ns += ns
+        if ns > self.max_ns:
+            self.max_ns = ns
+        bits = ns.bit_length()
+        bucket = bits << 2 if bits < 3 else (bits << 2) | ((ns >> (bits - 3)) & 3)
+        self.buckets[bucket] = self.buckets.get(bucket, 0) + 1
+
+    def percentile_ns(self, fraction: float) -> int:
+        rank = max(1, math.ceil(self.count * fraction))
+        seen = 0
+        for bucket in sorted(self.buckets):
+            seen += self.buckets[bucket]
+            if seen >= rank:
+                bits, quarter = bucket >> 2, bucket & 3
+                if bits < 3:
+                    return (1 << bits) - 1
+                # Upper edge of the bucket, capped by the largest sample seen.
+                return min(self.max_ns, ((4 | quarter) + 1) << (bits - 3))
+        return self.max_ns
+
+    def to_dict(self) -> dict[str, float | int]:
+        return {
+            "count": self.count,
+            "total_s": self.total_ns / 1e9,
+            "mean_us": self.total_ns / self.count / 1e3 if self.count else 0.0,
+            "p50_us": self.percentile_ns(0.50) / 1e3,
+            "p99_us": self.percentile_ns(0.99) / 1e3,
+            "max_us": self.max_ns / 1e3,
+        }
+
+
+class OpProfile:
+    def __init__(self):
+        self.ops: dict[str, OpStats] = {}
+
+    def record(self, op: str, ns: int) -> None:
+        stats = self.ops.get(op)
+        if stats is None:
+            stats = self.ops[op] = OpStats()
+        stats.record(ns)
+
+    def to_dict(self) -> dict[str, dict[str, float | int]]:
+        return {op: self.ops[op].to_dict() for op in sorted(self.ops)}
+
+
+def profile_solution(
+    solution: Callable[[list[list[str]]], list[str]], queries: list[list[str]]
+) -> tuple[list[str], OpProfile]:
+    """Run `solution` once and attribute its runtime to each query type.
+
+    The solution is fed a generator instead of the list, and the time between
+    handing out one query and being asked for the next is charged to that
+    query's type. Solutions need no hooks, so unprofiled runs pay nothing.
+    This relies on solution() consuming queries in a single forward pass.
+    """
+    profile = OpProfile()
+
+    def timed(clock: Callable[[], int] = time.perf_counter_ns) -> Iterator[list[str]]:
+        op = None
+        started = 0
+        for query in queries:
+            now = clock()
+            if op is not None:
+                profile.record(op, now - started)
+            op = query[0]
+            started = clock()
+            yield query
+        if op is not None:
+            profile.record(op, clock() - started)
+
+    outputs = solution(timed())  # type: ignore[arg-type]
+    return outputs, profile
@@ -0,0 +1,310 @@
+"""Throughput and memory benchmarks for the four solution() engines.
+
+Cases come from each verify script's scaled_case() generator, so the
+benchmark exercises the same query mix as verification, only larger.
+
+    python3 Verification/benchmark.py --output bench.json
+    python3 Verification/benchmark.py --compare bench.json
+    python3 Verification/benchmark.py --problems 03_transactional_kv_store --sizes 10000 100000 1000000
+    python3 Verification/benchmark.py --profile   # adds a per-query-type latency breakdown
+    python3 Verification/benchmark.py --corpus .corpus   # generate cases once, then load them via mmap
+    python3 Verification/benchmark.py --dispatch  # adds the cost of Tests/_dispatch.py alone, with no-op handlers
+    python3 Verification/benchmark.py --shards 1 2 4  # scoreboard/KV-store write throughput per worker-process count
+    python3 Verification/benchmark.py --threads 1 2 4 8  # scheduler throughput per thread count, checked against serial
+
+The default size is 10^5 queries. The slowest engines at that size are the
+scheduler, whose BOOK/CANCEL/MOVE/FREE scan a room's hot event list, and the
+TTL store, whose RESTORE materialises a backup by replaying its delta chain.
+"""
+
+from __future__ import annotations
+
+import argparse
+import importlib
+import json
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Callable
+
+from _corpus import cached_corpus
+from _harness import load_module_cached, load_solution, profile_solution, repo_root
+
+PROBLEMS: dict[str, tuple[str, str]] = {
+    "01_contest_scoreboard": ("verify_01_contest_scoreboard", "01_contest_scoreboard.py"),
+    "02_meeting_room_scheduler": ("verify_02_meeting_room_scheduler", "02_meeting_room_scheduler.py"),
+    "03_transactional_kv_store": ("verify_03_transactional_kv_store", "03_transactional_kv_store.py"),
+    "04_ttl_backup_store": ("verify_04_ttl_backup_store", "04_ttl_backup_store.py"),
+}
+
+DEFAULT_SIZES = [100_000]
+
+
+def case_factory(problem: str) -> Callable[[random.Random, int], list[list[str]]]:
+    module_name, _ = PROBLEMS[problem]
+    return importlib.import_module(module_name).scaled_case
+
+
+def make_case(problem: str, n: int, *, seed: int = 0, corpus_dir: Path | None = None) -> list[list[str]]:
+    factory = case_factory(problem)
+
+    def build() -> list[list[list[str]]]:
+        return [factory(random.Random(f"{problem}:{n}:{seed}"), n)]
+
+    if corpus_dir is None:
+        return build()[0]
+    version = Path(factory.__code__.co_filename).read_text()
+    return list(cached_corpus(corpus_dir, f"{problem}-{n}-{seed}", build, version=version)[0])
+
+
+def time_solution(
+    solution: Callable[[list[list[str]]], list[str]], queries: list[list[str]], *, repeats: int
+) -> list[float]:
+    timings: list[float] = []
+    for _ in range(repeats):
+        started = time.perf_counter()
+        solution(queries)
+        timings.append(time.perf_counter() - started)
+    return timings
+
+
+def dispatch_cost(problem: str, queries: list[list[str]], *, repeats: int) -> float:
+    """Best-of-`repeats` seconds to dispatch `queries` to no-op handlers: the floor under every engine."""
+    dispatcher = load_module_cached(repo_root() / "Tests" / "_dispatch.py")
+    dispatch = dispatcher.dispatch
+    table = dispatcher.opcode_table({q[0]: lambda q: None for q in queries})
+    clock = (lambda t: None) if problem == "04_ttl_backup_store" else None
+    best = float("inf")
+    for _ in range(repeats):
+        started = time.perf_counter()
+        for _ in dispatch(table, queries, clock=clock):
+            pass
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def peak_memory(solution: Callable[[list[list[str]]], list[str]], queries: list[list[str]]) -> int:
+    # A separate run: tracemalloc slows allocation-heavy code far too much to time under it.
+    tracemalloc.start()
+    try:
+        solution(queries)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak
+
+
+def run_benchmarks(
+    problems: list[str],
+    sizes: list[int],
+    *,
+    repeats: int,
+    memory: bool,
+    profile: bool = False,
+    corpus_dir: Path | None = None,
+    dispatch: bool = False,
+) -> list[dict]:
+    results: list[dict] = []
+    for problem in problems:
+        solution = load_solution(PROBLEMS[problem][1])
+        for n in sizes:
+            queries = make_case(problem, n, corpus_dir=corpus_dir)
+            timings = time_solution(solution, queries, repeats=repeats)
+            median = statistics.median(timings)
+            result = {
+                "problem": problem,
+                "size": n,
+                "queries": len(queries),
+                "timings_s": timings,
+                "best_s": min(timings),
+                "median_s": median,
+                "queries_per_s": len(queries) / median if median > 0 else None,
+                "peak_bytes": peak_memory(solution, queries) if memory else None,
+            }
+            if profile:
+                result["ops"] = profile_solution(solution, queries)[1].to_dict()
+            if dispatch:
+                result["dispatch_s"] = dispatch_cost(problem, queries, repeats=repeats)
+            results.append(result)
+            line = (
+                f"{problem:<28} n={len(queries):>8}  median={median * 1000:10.1f} ms"
+                f"  best={min(timings) * 1000:10.1f} ms"
+            )
+            if dispatch:
+                line += f"  dispatch={result['dispatch_s'] * 1000:8.1f} ms"
+            print(line, file=sys.stderr)
+    return results
+
+
+# Problems with a sharded multi-process mode (solution(..., workers=W)).
+SHARDED_PROBLEMS = ("01_contest_scoreboard", "03_transactional_kv_store")
+
+
+def shard_workload(problem: str, n: int, *, corpus_dir: Path | None = None) -> list[list[str]]:
+    """The writes of make_case(problem, n), plus one closing read that needs every shard's state.
+
+    Stopping the clock after that read means every write has been applied.
+    """
+    case = make_case(problem, n, corpus_dir=corpus_dir)
+    if problem == "01_contest_scoreboard":
+        queries = [q for q in case if q[0] == "SUBMIT"]
+        queries.append(["SCOREBOARD", queries[-1][1], "10"])
+    else:
+        queries = [q for q in case if q[0] in ("SET", "BEGIN", "COMMIT", "ROLLBACK")]
+        queries.append(["FIND", "f0", "v1"])
+    return queries
+
+
+def shard_scaling(
+    problem: str, n: int, workers: list[int], *, repeats: int, corpus_dir: Path | None = None
+) -> list[dict]:
+    """Write throughput of a problem's sharded mode for each worker count; workers=1 is the plain engine."""
+    queries = shard_workload(problem, n, corpus_dir=corpus_dir)
+    solution = load_solution(PROBLEMS[problem][1])
+    results: list[dict] = []
+    for count in workers:
+        timings = time_solution(lambda q: solution(q, workers=count), queries, repeats=repeats)
+        median = statistics.median(timings)
+        results.append(
+            {
+                "problem": problem,
+                "workers": count,
+                "writes": len(queries) - 1,
+                "median_s": median,
+                "writes_per_s": (len(queries) - 1) / median if median > 0 else None,
+            }
+        )
+        print(
+            f"{problem} sharded workers={count:<3} writes={len(queries) - 1:>8}"
+            f"  median={median * 1000:10.1f} ms  {results[-1]['writes_per_s']:12,.0f} writes/s",
+            file=sys.stderr,
+        )
+    return results
+
+
+def thread_scaling(n: int, threads: list[int], *, repeats: int, corpus_dir: Path | None = None) -> list[dict]:
+    """Throughput of the scheduler's lock-striped concurrent mode for each thread count.
+
+    Every run's outputs must equal a serial run's; a mismatch raises
+    AssertionError. threads=1 is the plain single-threaded engine.
+    """
+    problem = "02_meeting_room_scheduler"
+    queries = make_case(problem, n, corpus_dir=corpus_dir)
+    solution = load_solution(PROBLEMS[problem][1])
+    serial = solution(queries)
+    results: list[dict] = []
+    for count in threads:
+        outputs = solution(queries, threads=count)
+        if outputs != serial:
+            raise AssertionError(f"{problem} threads={count}: outputs differ from the serial run")
+        timings = time_solution(lambda q: solution(q, threads=count), queries, repeats=repeats)
+        median = statistics.median(timings)
+        results.append(
+            {
+                "threads": count,
+                "queries": len(queries),
+                "median_s": median,
+                "queries_per_s": len(queries) / median if median > 0 else None,
+            }
+        )
+        print(
+            f"{problem} threads={count:<3} queries={len(queries):>8}"
+            f"  median={median * 1000:10.1f} ms  {results[-1]['queries_per_s']:12,.0f} queries/s",
+            file=sys.stderr,
+        )
+    return results
+
+
+def compare(results: list[dict], baseline: list[dict], *, threshold: float) -> list[str]:
+    """Return a message for every result whose median slowed down by more than `threshold`."""
+    previous = {(r["problem"], r["size"]): r for r in baseline}
+    regressions: list[str] = []
+    for result in results:
+        base = previous.get((result["problem"], result["size"]))
+        if base is None:
+            continue
+        ratio = result["median_s"] / base["median_s"] if base["median_s"] > 0 else 1.0
+        if ratio > 1.0 + threshold:
+            regressions.append(
+                f"{result['problem']} n={result['size']}: median {base['median_s'] * 1000:.1f} ms"
+                f" -> {result['median_s'] * 1000:.1f} ms ({ratio:.2f}x)"
+            )
+    return regressions
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--problems", nargs="+", choices=sorted(PROBLEMS), default=sorted(PROBLEMS))
+    parser.add_argument("--sizes", nargs="+", type=int, default=DEFAULT_SIZES)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--no-memory", action="store_true", help="skip the tracemalloc peak-memory run")
+    parser.add_argument("--profile", action="store_true", help="add per-query-type counts and latency percentiles")
+    parser.add_argument("--dispatch", action="store_true", help="also time query dispatch alone, with no-op handlers")
+    parser.add_argument(
+        "--shards",
+        type=int,
+        nargs="+",
+        metavar="W",
+        help="also time write throughput of the sharded problems with W worker processes, for each W (largest --sizes)",
+    )
+    parser.add_argument(
+        "--threads",
+        type=int,
+        nargs="+",
+        metavar="T",
+        help="also time the scheduler on T threads with per-room lock striping, for each T (largest --sizes)",
+    )
+    parser.add_argument("--corpus", type=Path, help="directory caching generated cases as mmap-able corpora")
+    parser.add_argument("--output", type=Path, help="write JSON results here instead of stdout")
+    parser.add_argument("--compare", type=Path, help="baseline JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25, help="allowed slowdown before flagging (0.25 = 25%%)")
+    args = parser.parse_args(argv)
+
+    results = run_benchmarks(
+        args.problems,
+        args.sizes,
+        repeats=args.repeats,
+        memory=not args.no_memory,
+        profile=args.profile,
+        corpus_dir=args.corpus,
+        dispatch=args.dispatch,
+    )
+    report = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "repeats": args.repeats,
+        "results": results,
+    }
+    if args.shards:
+        report["shards"] = [
+            result
+            for problem in args.problems
+            if problem in SHARDED_PROBLEMS
+            for result in shard_scaling(
+                problem, max(args.sizes), args.shards, repeats=args.repeats, corpus_dir=args.corpus
+            )
+        ]
+    if args.threads:
+        report["threads"] = thread_scaling(max(args.sizes), args.threads, repeats=args.repeats, corpus_dir=args.corpus)
+    text = json.dumps(report, indent=2)
+    if args.output is not None:
+        args.output.write_text(text + "\n")
+    else:
+        print(text)
+
+    if args.compare is not None:
+        baseline = json.loads(args.compare.read_text())["results"]
+        regressions = compare(results, baseline, threshold=args.threshold)
+        for line in regressions:
+            print(f"REGRESSION {line}", file=sys.stderr)
+        if regressions:
+            raise SystemExit(1)
+        print("No regressions against baseline.", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
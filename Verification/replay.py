@@ -0,0 +1,181 @@
+"""Stream a query trace through one of the solution engines.
+
+Queries are read one at a time, fed to the engine's stream() generator, and
+each output is written as soon as it is produced, so a trace never has to fit
+in memory and a pipe shows results while the replay is still running.
+
+    python3 Verification/replay.py 01 trace.jsonl
+    python3 Verification/replay.py 04_ttl_backup_store capture.tsv --format tsv
+    zcat capture.jsonl.gz | python3 Verification/replay.py 03 - --output-format jsonl
+
+Input formats:
+
+    jsonl   one JSON array per line, e.g. ["SET", "10", "k", "f", "v"]
+            (non-string elements are converted with str())
+    tsv     one query per line, tokens separated by tabs
+
+Blank lines and lines starting with "#" are skipped. Queries/sec and peak RSS
+are reported on stderr once the input is exhausted.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, TextIO
+
+from _harness import load_module_from_path, repo_root
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+FORMATS = ("jsonl", "tsv")
+
+
+def find_problem(name: str) -> Path:
+    """Resolve "01", "01_contest_scoreboard" or "01_contest_scoreboard.py" to its Tests/ file."""
+    tests_dir = repo_root() / "Tests"
+    stem = Path(name).stem
+    matches = sorted(
+        p for p in tests_dir.glob("[0-9]*.py") if p.stem == stem or p.stem.split("_", 1)[0] == stem
+    )
+    if len(matches) != 1:
+        choices = ", ".join(p.stem for p in sorted(tests_dir.glob("[0-9]*.py")))
+        raise SystemExit(f"Unknown problem {name!r}; choose one of: {choices}")
+    return matches[0]
+
+
+def load_stream(path: Path, *, batched: bool = False) -> Callable[[Iterable[list[str]]], Iterator[str]]:
+    module = load_module_from_path(path)
+    stream = getattr(module, "stream", None)
+    if stream is not None:
+        return (lambda queries: stream(queries, batched=True)) if batched else stream
+    # Engines without a streaming entry point still work, just without incremental output.
+    return lambda queries: iter(module.solution(list(queries)))
+
+
+def parse_jsonl(line: str, lineno: int) -> list[str]:
+    try:
+        query = json.loads(line)
+    except json.JSONDecodeError as e:
+        raise ValueError(f"line {lineno}: invalid JSON: {e.msg}") from None
+    if not isinstance(query, list) or not query:
+        raise ValueError(f"line {lineno}: expected a non-empty JSON array")
+    return [v if isinstance(v, str) else str(v) for v in query]
+
+
+def parse_tsv(line: str, lineno: int) -> list[str]:
+    return line.split("\t")
+
+
+def read_queries(lines: Iterable[str], fmt: str) -> Iterator[list[str]]:
+    parse = parse_jsonl if fmt == "jsonl" else parse_tsv
+    for lineno, line in enumerate(lines, 1):
+        line = line.rstrip("\r\n")
+        if not line.strip() or line.startswith("#"):
+            continue
+        yield parse(line, lineno)
+
+
+def guess_format(path: str) -> str:
+    return "tsv" if path.endswith((".tsv", ".tab")) else "jsonl"
+
+
+def peak_rss_bytes() -> int | None:
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in kilobytes on Linux and in bytes on macOS.
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class _Counted:
+    """Counts the queries an engine has pulled so the report matches what was consumed."""
+
+    def __init__(self, queries: Iterable[list[str]]):
+        self._queries = iter(queries)
+        self.count = 0
+
+    def __iter__(self) -> Iterator[list[str]]:
+        for query in self._queries:
+            self.count += 1
+            yield query
+
+
+def replay(
+    stream: Callable[[Iterable[list[str]]], Iterator[str]],
+    queries: Iterable[list[str]],
+    out: TextIO,
+    *,
+    output_format: str = "text",
+    flush: bool = False,
+) -> tuple[int, int, float]:
+    """Feed `queries` through `stream`, writing outputs to `out`.
+
+    Returns (queries consumed, outputs written, elapsed seconds).
+    """
+    counted = _Counted(queries)
+    outputs = 0
+    started = time.perf_counter()
+    for output in stream(counted):
+        out.write((json.dumps(output) if output_format == "jsonl" else output) + "\n")
+        if flush:
+            out.flush()
+        outputs += 1
+    return counted.count, outputs, time.perf_counter() - started
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("problem", help='Tests/ file stem or number, e.g. "01" or "04_ttl_backup_store"')
+    parser.add_argument("input", nargs="?", default="-", help='query file, or "-" for stdin (default)')
+    parser.add_argument("--format", choices=FORMATS, help="input format (default: from the file extension, else jsonl)")
+    parser.add_argument(
+        "--output-format",
+        choices=("text", "jsonl"),
+        default="text",
+        help="text writes outputs verbatim; jsonl writes JSON strings, which keeps empty outputs visible",
+    )
+    parser.add_argument("--flush", action="store_true", help="flush after every output line")
+    parser.add_argument(
+        "--batched", action="store_true", help="answer runs of consecutive reads as batches (outputs arrive per run)"
+    )
+    parser.add_argument("--quiet", action="store_true", help="discard outputs, only report throughput")
+    args = parser.parse_args(argv)
+
+    stream = load_stream(find_problem(args.problem), batched=args.batched)
+    fmt = args.format or guess_format(args.input)
+
+    source: TextIO = sys.stdin if args.input == "-" else open(args.input, encoding="utf-8")
+    sink: TextIO = open(os.devnull, "w") if args.quiet else sys.stdout
+    try:
+        count, outputs, elapsed = replay(
+            stream, read_queries(source, fmt), sink, output_format=args.output_format, flush=args.flush
+        )
+    except ValueError as e:
+        raise SystemExit(f"replay: {e}")
+    finally:
+        if source is not sys.stdin:
+            source.close()
+        if sink is not sys.stdout:
+            sink.close()
+        else:
+            sink.flush()
+
+    qps = count / elapsed if elapsed > 0 else float("inf")
+    rss = peak_rss_bytes()
+    rss_text = f"{rss / 2**20:.1f} MiB" if rss is not None else "n/a"
+    print(
+        f"{count} queries, {outputs} outputs in {elapsed:.3f}s ({qps:,.0f} queries/s), peak RSS {rss_text}",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -1,25 +1,118 @@
 from __future__ import annotations
 
+import argparse
+import importlib
+import io
+import os
 import subprocess
 import sys
+import time
+import traceback
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import redirect_stdout
 from pathlib import Path
 
+from _harness import LOADER_STATS
+
+
+def _run_script(script: Path, extra_args: list[str]) -> tuple[int, str, float]:
+    started = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, str(script), *extra_args],
+        text=True,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+    )
+    return proc.returncode, proc.stdout, time.perf_counter() - started
+
+
+def _run_in_process(script: Path, extra_args: list[str]) -> tuple[int, str, float]:
+    # Scripts share this interpreter, its imports and the harness module cache.
+    started = time.perf_counter()
+    output = io.StringIO()
+    returncode = 0
+    with redirect_stdout(output):
+        try:
+            importlib.import_module(script.stem).main(extra_args)
+        except SystemExit as e:
+            if isinstance(e.code, str):
+                print(e.code)
+            returncode = e.code if isinstance(e.code, int) else int(e.code is not None)
+        except Exception:
+            traceback.print_exc(file=output)
+            returncode = 1
+    return returncode, output.getvalue(), time.perf_counter() - started
+
+
+def _interpreter_startup(here: Path) -> float:
+    """Seconds for a fresh interpreter to start and import the harness, i.e. what each subprocess pays."""
+    started = time.perf_counter()
+    subprocess.run([sys.executable, "-c", "import _harness"], cwd=here, check=True)
+    return time.perf_counter() - started
+
 
 def main() -> None:
+    parser = argparse.ArgumentParser(
+        description="Run every verify_*.py script; unrecognised arguments are passed on to each script."
+    )
+    parser.add_argument(
+        "--jobs",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="number of scripts to run at once, each in its own interpreter",
+    )
+    parser.add_argument(
+        "--in-process",
+        action="store_true",
+        help="run the scripts one after another in this interpreter instead of starting one per script",
+    )
+    args, extra_args = parser.parse_known_args()
+
     here = Path(__file__).resolve().parent
     scripts = sorted(p for p in here.glob("verify_*.py") if p.is_file())
     if not scripts:
         raise SystemExit("No verify_*.py scripts found.")
 
-    for script in scripts:
+    # Subprocess runs happen concurrently, but output is always printed in name order.
+    failed: list[tuple[Path, int]] = []
+    timings: list[tuple[Path, float]] = []
+    if args.in_process:
+        runs = (_run_in_process(script, extra_args) for script in scripts)
+    else:
+        pool = ThreadPoolExecutor(max_workers=max(1, args.jobs))
+        runs = (future.result() for future in [pool.submit(_run_script, s, extra_args) for s in scripts])
+    started = time.perf_counter()
+    for script, (returncode, output, seconds) in zip(scripts, runs):
         print(f"==> {script.name}")
-        proc = subprocess.run([sys.executable, str(script)], text=True)
-        if proc.returncode != 0:
-            raise SystemExit(proc.returncode)
+        print(output, end="", flush=True)
+        timings.append((script, seconds))
+        if returncode != 0:
+            failed.append((script, returncode))
+    if not args.in_process:
+        pool.shutdown()
+    elapsed = time.perf_counter() - started
+
+    print("Timing:")
+    for script, seconds in timings:
+        print(f"  {script.name:<40} {seconds:8.2f} s")
+    print(f"  {'total':<40} {elapsed:8.2f} s")
+
+    if args.in_process:
+        startup = _interpreter_startup(here)
+        print(
+            f"Startup: {len(scripts)} scripts shared one interpreter; a fresh one costs {startup * 1000:.0f} ms,"
+            f" so about {startup * len(scripts) * 1000:.0f} ms saved."
+            f" Module cache: {LOADER_STATS.loads} loads ({LOADER_STATS.load_seconds * 1000:.0f} ms),"
+            f" {LOADER_STATS.hits} hits."
+        )
+
+    if failed:
+        for script, returncode in failed:
+            print(f"FAILED: {script.name} (exit {returncode})")
+        raise SystemExit(failed[0][1])
 
     print("ALL VERIFICATIONS PASSED")
 
 
 if __name__ == "__main__":
     main()
-
@@ -1,9 +1,43 @@
 from __future__ import annotations
 
+import asyncio
 import random
-from copy import deepcopy
+from bisect import bisect_left, insort
+from collections import deque
+from typing import Sequence
 
-from _harness import assert_equal, assert_is_list_of_str, load_solution, run_solution
+from _harness import (
+    NEAR_LINEAR,
+    SolutionRef,
+    assert_equal,
+    check_complexity,
+    format_case_timings,
+    format_timings,
+    load_cases,
+    load_scaled_cases,
+    load_module_cached,
+    parse_args,
+    repo_root,
+    run_cases,
+)
+
+
+# The ranking is kept sorted per AC, so SCOREBOARD no longer re-sorts every user.
+COMPLEXITY_BUDGET = NEAR_LINEAR
+
+# SCOREBOARD_DELTA serves cursors up to this many changes old (see the problem statement).
+DELTA_RETENTION = 1024
+# Largest k the generator asks SCOREBOARD_DELTA for; the fast oracle snapshots this many rows.
+DELTA_DEPTH = 8
+
+
+def _delta_line(version: int, k: int, now: Sequence[str], then: Sequence[str] | None) -> str:
+    """Format a SCOREBOARD_DELTA answer from the current rows and the rows at the cursor (None if unservable)."""
+    top = now[:k]
+    if then is None:
+        return f"{version}|full|" + ",".join(f"{r}={row}" for r, row in enumerate(top, 1))
+    changed = [f"{r}={row}" for r, row in enumerate(top, 1) if r > len(then) or then[r - 1] != row]
+    return f"{version}|delta|" + ",".join(changed)
 
 
 def _oracle(queries: list[list[str]]) -> list[str]:
@@ -11,6 +45,30 @@ def _oracle(queries: list[list[str]]) -> list[str]:
     per_user_problem: dict[str, dict[str, list[int | bool]]] = {}
     totals: dict[str, tuple[int, int]] = {}  # user -> (solved, penalty)
     outputs: list[str] = []
+    ac_count = 0
+    history: list[list[str]] = [[]]  # history[v] = every ranked row at version v
+
+    def rows() -> list[str]:
+        ranked = [(user, solved, penalty) for user, (solved, penalty) in totals.items() if solved > 0]
+        ranked.sort(key=lambda x: (-x[1], x[2], x[0]))
+        return [f"{u}:{s}:{p}" for u, s, p in ranked]
+
+    def problem_line(problem: str) -> str:
+        # Full scan on purpose: the engine keeps these counters incrementally.
+        solves = attempts = 0
+        first: tuple[int, str, int] | None = None  # (ac_order, user, ac_time)
+        for user, user_state in per_user_problem.items():
+            state = user_state.get(problem)
+            if state is None:
+                continue
+            attempts += int(state[0]) + bool(state[1])
+            if state[1]:
+                solves += 1
+                if first is None or int(state[3]) < first[0]:
+                    first = (int(state[3]), user, int(state[2]))
+        if first is None:
+            return f"{problem}:{solves}:{attempts}::"
+        return f"{problem}:{solves}:{attempts}:{first[1]}:{first[2]}"
 
     for q in queries:
         kind = q[0]
@@ -23,8 +81,8 @@ def _oracle(queries: list[list[str]]) -> list[str]:
             user_state = per_user_problem.setdefault(user, {})
             problem_state = user_state.get(problem)
             if problem_state is None:
-                # [wrong, solved(bool), ac_time]
-                problem_state = [0, False, -1]
+                # [wrong, solved(bool), ac_time, ac_order]
+                problem_state = [0, False, -1, -1]
                 user_state[problem] = problem_state
 
             wrong = int(problem_state[0])
@@ -38,8 +96,11 @@ def _oracle(queries: list[list[str]]) -> list[str]:
             elif verdict == "AC":
                 problem_state[1] = True
                 problem_state[2] = t
+                problem_state[3] = ac_count
+                ac_count += 1
                 solved_count, penalty_sum = totals.get(user, (0, 0))
                 totals[user] = (solved_count + 1, penalty_sum + t + 20 * wrong)
+                history.append(rows())
             else:
                 raise ValueError(f"Unknown verdict: {verdict!r}")
 
@@ -56,28 +117,125 @@ def _oracle(queries: list[list[str]]) -> list[str]:
                 outputs.append("")
             else:
                 outputs.append(",".join(f"{u}:{s}:{p}" for u, s, p in top))
+        elif kind == "PROBLEM_STATS":
+            if len(q) > 2:
+                outputs.append(problem_line(q[2]))
+            else:
+                # A problem enters per_user_problem with its first submission, which always counts.
+                seen = sorted({p for user_state in per_user_problem.values() for p in user_state})
+                outputs.append(",".join(problem_line(p) for p in seen))
+        elif kind == "SCOREBOARD_DELTA":
+            k, cursor = int(q[2]), int(q[3])
+            if k < 1:
+                raise ValueError(f"SCOREBOARD_DELTA needs k >= 1, got {k}")
+            version = len(history) - 1
+            servable = cursor >= 0 and 0 <= version - cursor <= DELTA_RETENTION
+            outputs.append(_delta_line(version, k, rows(), history[cursor] if servable else None))
         else:
             raise ValueError(f"Unknown query type: {kind!r}")
 
     return outputs
 
 
-def _generate_random_case(rng: random.Random, *, users: list[str], problems: list[str]) -> list[list[str]]:
+def _fast_oracle(queries: Sequence[list[str]]) -> list[str]:
+    # Independent of _oracle: the ranking is kept sorted with bisect instead of re-sorted per query.
+    wrong: dict[tuple[str, str], int] = {}
+    solved_pairs: set[tuple[str, str]] = set()
+    score: dict[str, tuple[int, int]] = {}  # user -> (solved, penalty)
+    ranking: list[tuple[int, int, str]] = []  # sorted (-solved, penalty, user)
+    problem_solves: dict[str, int] = {}
+    problem_attempts: dict[str, int] = {}
+    first_solve: dict[str, str] = {}  # problem -> "user:t"
+    # The top DELTA_DEPTH rows after each of the last DELTA_RETENTION changes, keyed by version.
+    snapshots: deque[list[str]] = deque([[]], maxlen=DELTA_RETENTION + 1)
+    version = 0
+    outputs: list[str] = []
+
+    def problem_line(problem: str) -> str:
+        solves = problem_solves.get(problem, 0)
+        attempts = problem_attempts.get(problem, 0)
+        return f"{problem}:{solves}:{attempts}:{first_solve.get(problem, ':')}"
+
+    for q in queries:
+        kind = q[0]
+        if kind == "SUBMIT":
+            _, t_s, user, problem, verdict = q
+            pair = (user, problem)
+            if pair in solved_pairs:
+                continue
+            if verdict in ("WA", "AC"):
+                problem_attempts[problem] = problem_attempts.get(problem, 0) + 1
+            if verdict == "AC":
+                problem_solves[problem] = problem_solves.get(problem, 0) + 1
+                first_solve.setdefault(problem, f"{user}:{int(t_s)}")
+            if verdict == "WA":
+                wrong[pair] = wrong.get(pair, 0) + 1
+            elif verdict == "AC":
+                solved_pairs.add(pair)
+                solved, penalty = score.get(user, (0, 0))
+                if solved:
+                    del ranking[bisect_left(ranking, (-solved, penalty, user))]
+                solved, penalty = solved + 1, penalty + int(t_s) + 20 * wrong.pop(pair, 0)
+                score[user] = (solved, penalty)
+                insort(ranking, (-solved, penalty, user))
+                version += 1
+                snapshots.append([f"{u}:{-neg}:{p}" for neg, p, u in ranking[:DELTA_DEPTH]])
+            else:
+                raise ValueError(f"Unknown verdict: {verdict!r}")
+        elif kind == "SCOREBOARD":
+            k = int(q[2])
+            outputs.append(",".join(f"{u}:{-neg}:{p}" for neg, p, u in ranking[:k]))
+        elif kind == "PROBLEM_STATS":
+            problems = q[2:] or sorted(problem_attempts)
+            outputs.append(",".join(problem_line(problem) for problem in problems))
+        elif kind == "SCOREBOARD_DELTA":
+            k, cursor = int(q[2]), int(q[3])
+            if k > DELTA_DEPTH:
+                raise ValueError(f"fast oracle only snapshots the top {DELTA_DEPTH} rows, got k={k}")
+            since = version - cursor
+            then = snapshots[-1 - since] if cursor >= 0 and 0 <= since <= DELTA_RETENTION else None
+            outputs.append(_delta_line(version, k, snapshots[-1], then))
+        else:
+            raise ValueError(f"Unknown query type: {kind!r}")
+
+    return outputs
+
+
+def _generate_random_case(
+    rng: random.Random, *, users: list[str], problems: list[str], n: int | None = None
+) -> list[list[str]]:
     t = 0
     queries: list[list[str]] = []
+    solved: set[tuple[str, str]] = set()  # its size is the scoreboard version
     # Ensure at least one SCOREBOARD.
-    n = rng.randint(40, 120)
+    if n is None:
+        n = rng.randint(40, 120)
     for _ in range(n):
         t += rng.randint(0, 3)
         if rng.random() < 0.2:
             k = rng.randint(1, 6)
             queries.append(["SCOREBOARD", str(t), str(k)])
             continue
+        if rng.random() < 0.1:
+            # Half ask for one problem (possibly one nobody has submitted to yet), half for all.
+            scope = [rng.choice(problems)] if rng.random() < 0.5 else []
+            queries.append(["PROBLEM_STATS", str(t), *scope])
+            continue
+        if rng.random() < 0.1:
+            # Mostly recent cursors; some current, ancient or not yet issued.
+            version = len(solved)
+            cursor = rng.choice(
+                [version, max(0, version - rng.randint(1, 5)), rng.randint(0, version), 0, version + rng.randint(1, 3)]
+            )
+            queries.append(["SCOREBOARD_DELTA", str(t), str(rng.randint(1, DELTA_DEPTH)), str(cursor)])
+            continue
 
         user = rng.choice(users)
         problem = rng.choice(problems)
         verdict = "AC" if rng.random() < 0.35 else "WA"
         queries.append(["SUBMIT", str(t), user, problem, verdict])
+        if verdict == "AC":
+            solved.add((user, problem))
 
     if queries[-1][0] != "SCOREBOARD":
         t += 1
@@ -85,10 +243,116 @@ def _generate_random_case(rng: random.Random, *, users: list[str], problems: lis
     return queries
 
 
-def main() -> None:
-    candidate = load_solution("01_contest_scoreboard.py")
+def _random_cases() -> list[list[list[str]]]:
+    rng = random.Random(1337)
+    return [
+        _generate_random_case(rng, users=["alice", "bob", "carl", "dana", "erin"], problems=["A", "B", "C", "D"])
+        for _ in range(25)
+    ]
 
-    cases: list[list[list[str]]] = [
+
+def scaled_case(rng: random.Random, n: int) -> list[list[str]]:
+    """A case of about `n` queries whose user count grows with n."""
+    users = [f"user{i}" for i in range(max(5, n // 20))]
+    problems = [chr(ord("A") + i) for i in range(12)]
+    return _generate_random_case(rng, users=users, problems=problems, n=n)
+
+
+async def _subscriptions() -> None:
+    """Drive ScoreboardServer over localhost; raises AssertionError on the first wrong update."""
+    engine = load_module_cached(repo_root() / "Tests" / "01_contest_scoreboard.py")
+    server = engine.ScoreboardServer(write_buffer_high=16 * 1024)
+    port = await server.start()
+    board = server.board
+
+    async def subscribe(k: str) -> tuple[asyncio.StreamReader, asyncio.StreamWriter]:
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"SUBSCRIBE {k}\n".encode())
+        return reader, writer
+
+    async def line(reader: asyncio.StreamReader) -> str:
+        return (await asyncio.wait_for(reader.readline(), 5)).decode().rstrip("\n")
+
+    try:
+        server.apply([["SUBMIT", "1", "alice", "A", "AC"], ["SUBMIT", "2", "bob", "A", "AC"]])
+        top1, w1 = await subscribe("1")
+        top3, w3 = await subscribe("3")
+        assert_equal(await line(top1), "2|alice:1:1", context="subscriptions: initial top 1")
+        assert_equal(await line(top3), "2|alice:1:1,bob:1:2", context="subscriptions: initial top 3")
+
+        # carl enters at rank 3: only the top-3 subscriber hears about it.
+        server.apply([["SUBMIT", "3", "carl", "A", "AC"]])
+        assert_equal(await line(top3), "3|alice:1:1,bob:1:2,carl:1:3", context="subscriptions: rank 3 change")
+        # A WA changes nobody's row and produces nothing.
+        server.apply([["SUBMIT", "4", "bob", "B", "WA"]])
+        # A burst inside one apply() arrives as one line; bob's B AC moves rank 1.
+        server.apply([["SUBMIT", "5", "bob", "B", "AC"], ["SUBMIT", "6", "carl", "B", "AC"]])
+        burst = "5|carl:2:9,bob:2:27,alice:1:1"
+        assert_equal(await line(top1), "5|carl:2:9", context="subscriptions: top 1 after burst")
+        assert_equal(await line(top3), burst, context="subscriptions: coalesced burst")
+        for reader, name in ((top1, "top 1"), (top3, "top 3")):
+            try:
+                extra = await asyncio.wait_for(reader.readline(), 0.05)
+            except asyncio.TimeoutError:
+                continue
+            raise AssertionError(f"subscriptions: unexpected extra update for {name}: {extra!r}")
+
+        for k in ("many", "0", "-3"):
+            bad, bad_writer = await subscribe(k)
+            assert_equal((await line(bad)).split()[0], "ERROR", context=f"subscriptions: SUBSCRIBE {k}")
+            bad_writer.close()
+
+        # A subscriber that stops reading: the server keeps only a bounded write buffer and the latest state.
+        slow, slow_writer = await subscribe("100000")
+        await line(slow)
+        (subscriber,) = [s for s in server.subscribers if s.k == 100000]
+        peak = 0
+        for i in range(3000):
+            server.apply([["SUBMIT", str(10 + i), f"user{i:05d}", "A", "AC"]])
+            await asyncio.sleep(0)
+            peak = max(peak, subscriber.writer.transport.get_write_buffer_size())
+        final = f"{board.version}|{board.scoreboardHandler(100000)}"
+        if peak > 2 * server.write_buffer_high + len(final):
+            raise AssertionError(f"subscriptions: slow subscriber's write buffer grew to {peak} bytes")
+        received = 0
+        while await line(slow) != final:
+            received += 1
+        if received >= 3000:
+            raise AssertionError(f"subscriptions: slow subscriber got {received} updates, none coalesced")
+        slow_writer.close()
+        for writer in (w1, w3):
+            writer.close()
+    finally:
+        await server.close()
+
+
+def _check_subscriptions() -> None:
+    asyncio.run(_subscriptions())
+
+
+def _check_delta_k() -> None:
+    # SCOREBOARD_DELTA has no sensible answer for k < 1, so it refuses one like SUBSCRIBE does.
+    engine = load_module_cached(repo_root() / "Tests" / "01_contest_scoreboard.py")
+    for k in ("0", "-3"):
+        queries = [["SUBMIT", "1", "alice", "A", "AC"], ["SCOREBOARD_DELTA", "2", k, "0"]]
+        try:
+            got = engine.solution(queries)
+        except ValueError:
+            continue
+        raise AssertionError(f"SCOREBOARD_DELTA k={k}: expected ValueError, got {got!r}")
+
+
+def _without_deltas(case: Sequence[list[str]]) -> list[list[str]]:
+    return [query for query in case if query[0] != "SCOREBOARD_DELTA"]
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    candidate = SolutionRef("01_contest_scoreboard.py")
+    batched = SolutionRef("01_contest_scoreboard.py", batched=True)
+    sharded = SolutionRef("01_contest_scoreboard.py", workers=3)
+
+    cases: list[Sequence[list[str]]] = [
         [
             ["SUBMIT", "10", "alice", "A", "WA"],
             ["SUBMIT", "15", "alice", "A", "AC"],  # 35
@@ -114,27 +378,77 @@ def main() -> None:
             ["SUBMIT", "6", "u", "P", "WA"],  # ignored post-AC
             ["SCOREBOARD", "7", "3"],
         ],
+        [
+            ["PROBLEM_STATS", "0"],  # nothing submitted yet
+            ["PROBLEM_STATS", "0", "A"],
+            ["SUBMIT", "1", "bob", "A", "WA"],
+            ["SUBMIT", "2", "carl", "A", "AC"],
+            ["SUBMIT", "2", "bob", "A", "AC"],  # same t as carl, but carl's AC came first
+            ["SUBMIT", "3", "bob", "A", "WA"],  # ignored post-AC, not an attempt
+            ["SUBMIT", "4", "alice", "B", "WA"],
+            ["PROBLEM_STATS", "5", "A"],
+            ["PROBLEM_STATS", "5", "B"],
+            ["PROBLEM_STATS", "5", "C"],
+            ["PROBLEM_STATS", "5"],
+        ],
+        [
+            ["SCOREBOARD_DELTA", "0", "3", "0"],  # 0|delta|
+            ["SUBMIT", "1", "alice", "A", "AC"],  # v1: alice 1
+            ["SUBMIT", "2", "bob", "A", "AC"],  # v2: alice, bob
+            ["SCOREBOARD_DELTA", "3", "3", "0"],  # both rows are new
+            ["SUBMIT", "4", "bob", "B", "AC"],  # v3: bob passes alice, both positions change
+            ["SCOREBOARD_DELTA", "5", "3", "2"],
+            ["SCOREBOARD_DELTA", "5", "1", "2"],  # only rank 1 is inside k
+            ["SCOREBOARD_DELTA", "5", "3", "3"],  # up to date: nothing changed
+            ["SUBMIT", "6", "carl", "A", "WA"],  # no AC, no new version
+            ["SCOREBOARD_DELTA", "7", "3", "3"],
+            ["SCOREBOARD_DELTA", "7", "3", "9"],  # future cursor: full
+            ["SCOREBOARD_DELTA", "7", "3", "-1"],  # invalid cursor: full
+        ],
+        # More changes than are retained: cursor 0 falls out of the log, the last 1024 do not.
+        [["SUBMIT", str(i), f"u{i:04d}", "A", "AC"] for i in range(DELTA_RETENTION + 2)]
+        + [
+            ["SCOREBOARD_DELTA", "9999", "2", "0"],
+            ["SCOREBOARD_DELTA", "9999", "2", "1"],
+            ["SCOREBOARD_DELTA", "9999", "2", "2"],
+        ],
     ]
 
-    rng = random.Random(1337)
-    for _ in range(25):
-        cases.append(
-            _generate_random_case(
-                rng, users=["alice", "bob", "carl", "dana", "erin"], problems=["A", "B", "C", "D"]
-            )
-        )
+    cases.extend(load_cases("verify_01_contest_scoreboard", _random_cases, corpus_dir=args.corpus))
 
     try:
-        for i, queries in enumerate(cases, start=1):
-            expected = _oracle(deepcopy(queries))
-            got = run_solution(candidate, deepcopy(queries), context=f"case {i}")
-            assert_is_list_of_str(got, context=f"case {i}: return type")
-            assert_equal(got, expected, context=f"case {i}")
+        candidates = {"": candidate, "batched reads": batched, "fast oracle": _fast_oracle}
+        results = run_cases(cases, _oracle, candidates, workers=args.workers)
+        # Sharded mode has no SCOREBOARD_DELTA, so it replays every case without those queries.
+        _check_subscriptions()
+        _check_delta_k()
+        results += run_cases(
+            [_without_deltas(case) for case in cases],
+            _oracle,
+            {"sharded": sharded},
+            workers=args.workers,
+            first_index=len(cases) + 1,
+        )
+        if args.scale:
+            scaled = load_scaled_cases("verify_01_contest_scoreboard", scaled_case, args.scale, corpus_dir=args.corpus)
+            results += run_cases(
+                scaled, _fast_oracle, {"": candidate}, workers=args.workers, first_index=2 * len(cases) + 1
+            )
+        if args.complexity:
+            slope = check_complexity(
+                candidate,
+                lambda n: scaled_case(random.Random(n), n),
+                budget=COMPLEXITY_BUDGET,
+                context="complexity",
+            )
+            print(f"verify_01_contest_scoreboard: runtime ~ n^{slope:.2f} (budget n^{COMPLEXITY_BUDGET:.2f})")
     except AssertionError as e:
         print(f"verify_01_contest_scoreboard: FAIL\n{e}")
         raise SystemExit(1)
 
-    print("verify_01_contest_scoreboard: PASS")
+    print(f"verify_01_contest_scoreboard: PASS ({format_timings(results)})")
+    if args.timings:
+        print(format_case_timings(results))
 
 
 if __name__ == "__main__":
@@ -1,9 +1,29 @@
 from __future__ import annotations
 
 import random
-from copy import deepcopy
+import threading
+from bisect import bisect_left, bisect_right, insort
+from typing import Sequence
 
-from _harness import assert_equal, assert_is_list_of_str, load_solution, run_solution
+from _harness import (
+    QUADRATIC,
+    SolutionRef,
+    check_complexity,
+    format_case_timings,
+    format_timings,
+    load_cases,
+    load_module_cached,
+    load_scaled_cases,
+    parse_args,
+    repo_root,
+    run_cases,
+)
+
+
+# BOOK/CANCEL/MOVE/FREE scan the room's hot event list, which grows with the
+# booking horizon until an ARCHIVE trims it. Measured around n^1.5, too close
+# to SUPERLINEAR for timer noise, so the budget stays quadratic.
+COMPLEXITY_BUDGET = QUADRATIC
 
 
 def _overlaps(a_start: int, a_end: int, b_start: int, b_end: int) -> bool:
@@ -120,24 +140,139 @@ def _oracle(queries: list[list[str]]) -> list[str]:
                 events_sorted = sorted(events, key=lambda x: (x[0], x[1], x[2]))
                 outputs.append(",".join(f"{s}-{e}:{t}" for s, e, t in events_sorted))
 
+        elif kind == "NEXT_SLOT":
+            room, after, duration = q[1], int(q[2]), int(q[3])
+            if duration <= 0:
+                outputs.append("-1")
+                continue
+            events = rooms.get(room, [])
+            # The earliest slot starts at `after` or right where some later event ends.
+            candidates = sorted([after] + [e for _, e, _ in events if e > after])
+            slot = next(
+                c for c in candidates if not any(_overlaps(c, c + duration, s, e) for s, e, _ in events)
+            )
+            outputs.append(str(slot))
+
+        elif kind == "ARCHIVE":
+            continue  # a storage hint only; no output and no visible effect
+
         else:
             raise ValueError(f"Unknown query type: {kind!r}")
 
     return outputs
 
 
-def _random_case(rng: random.Random) -> list[list[str]]:
-    rooms = ["R1", "R2", "R3"]
+def _fast_oracle(queries: Sequence[list[str]]) -> list[str]:
+    # Independent of _oracle: events in a room never overlap, so sorting them by start
+    # also sorts their ends, and every check is a bisect instead of a scan.
+    starts: dict[str, list[int]] = {}
+    ends: dict[str, list[int]] = {}
+    titles: dict[str, list[str]] = {}
+    by_title: dict[tuple[str, str], list[int]] = {}  # (room, title) -> sorted starts
+    outputs: list[str] = []
+
+    def fits(room: str, start: int, end: int, skip: int = -1) -> bool:
+        room_starts, room_ends = starts.get(room, []), ends.get(room, [])
+        i = bisect_left(room_starts, end) - 1  # last event starting before `end` has the largest end of those
+        if i == skip:
+            i -= 1
+        return i < 0 or room_ends[i] <= start
+
+    def insert(room: str, start: int, end: int, title: str) -> None:
+        rs = starts.setdefault(room, [])
+        i = bisect_left(rs, start)
+        rs.insert(i, start)
+        ends.setdefault(room, []).insert(i, end)
+        titles.setdefault(room, []).insert(i, title)
+        insort(by_title.setdefault((room, title), []), start)
+
+    def remove(room: str, index: int) -> None:
+        title = titles[room].pop(index)
+        start = starts[room].pop(index)
+        ends[room].pop(index)
+        same = by_title[(room, title)]
+        del same[bisect_left(same, start)]
+
+    for q in queries:
+        kind = q[0]
+        if kind == "BOOK":
+            room, start, end, title = q[1], int(q[2]), int(q[3]), q[4]
+            if start < end and fits(room, start, end):
+                insert(room, start, end, title)
+                outputs.append("true")
+            else:
+                outputs.append("false")
+        elif kind == "CANCEL":
+            room, title = q[1], q[2]
+            same = by_title.get((room, title))
+            if not same:
+                outputs.append("false")
+            else:
+                remove(room, bisect_left(starts[room], same[0]))
+                outputs.append("true")
+        elif kind == "MOVE":
+            room, title, start, end = q[1], q[2], int(q[3]), int(q[4])
+            same = by_title.get((room, title))
+            if start >= end or not same:
+                outputs.append("false")
+                continue
+            index = bisect_left(starts[room], same[0])
+            if not fits(room, start, end, skip=index):
+                outputs.append("false")
+                continue
+            remove(room, index)
+            insert(room, start, end, title)
+            outputs.append("true")
+        elif kind == "FREE":
+            room, start, end = q[1], int(q[2]), int(q[3])
+            if start >= end:
+                outputs.append("0")
+                continue
+            room_starts, room_ends = starts.get(room, []), ends.get(room, [])
+            first, last = bisect_right(room_ends, start), bisect_left(room_starts, end)
+            busy = sum(min(room_ends[i], end) - max(room_starts[i], start) for i in range(first, last))
+            outputs.append(str(end - start - busy))
+        elif kind == "AGENDA":
+            room = q[1]
+            outputs.append(
+                ",".join(f"{s}-{e}:{t}" for s, e, t in zip(starts.get(room, []), ends.get(room, []), titles.get(room, [])))
+            )
+        elif kind == "NEXT_SLOT":
+            room, slot, duration = q[1], int(q[2]), int(q[3])
+            if duration <= 0:
+                outputs.append("-1")
+                continue
+            room_starts, room_ends = starts.get(room, []), ends.get(room, [])
+            # Walk the events that end after `slot`, pushing it past each one it collides with.
+            for i in range(bisect_right(room_ends, slot), len(room_starts)):
+                if room_starts[i] - slot >= duration:
+                    break
+                slot = max(slot, room_ends[i])
+            outputs.append(str(slot))
+        elif kind == "ARCHIVE":
+            continue
+        else:
+            raise ValueError(f"Unknown query type: {kind!r}")
+
+    return outputs
+
+def _random_case(
+    rng: random.Random, *, n: int | None = None, rooms: list[str] | None = None, horizon: int = 120
+) -> list[list[str]]:
+    if rooms is None:
+        rooms = ["R1", "R2", "R3"]
     titles = ["standup", "retro", "1:1", "planning", "demo"]
     queries: list[list[str]] = []
-    for _ in range(rng.randint(40, 120)):
+    if n is None:
+        n = rng.randint(40, 120)
+    for _ in range(n):
         op = rng.choices(
-            population=["BOOK", "CANCEL", "MOVE", "FREE", "AGENDA"],
-            weights=[0.45, 0.12, 0.18, 0.18, 0.07],
+            population=["BOOK", "CANCEL", "MOVE", "FREE", "AGENDA", "NEXT_SLOT", "ARCHIVE"],
+            weights=[0.45, 0.12, 0.18, 0.18, 0.07, 0.1, 0.03],
         )[0]
         room = rng.choice(rooms)
         if op == "BOOK":
-            start = rng.randint(0, 120)
+            start = rng.randint(0, horizon)
             end = start + rng.randint(0, 40)  # may be invalid (0)
             title = rng.choice(titles)
             queries.append(["BOOK", room, str(start), str(end), title])
@@ -146,22 +281,73 @@ def _random_case(rng: random.Random) -> list[list[str]]:
             queries.append(["CANCEL", room, title])
         elif op == "MOVE":
             title = rng.choice(titles)
-            start = rng.randint(0, 120)
+            start = rng.randint(0, horizon)
             end = start + rng.randint(0, 40)
             queries.append(["MOVE", room, title, str(start), str(end)])
         elif op == "FREE":
-            start = rng.randint(0, 120)
-            end = rng.randint(0, 160)
+            start = rng.randint(0, horizon)
+            end = rng.randint(0, horizon + 40)
             queries.append(["FREE", room, str(start), str(end)])
+        elif op == "NEXT_SLOT":
+            after = rng.randint(-10, horizon)
+            duration = rng.randint(0, 40)  # may be invalid (0)
+            queries.append(["NEXT_SLOT", room, str(after), str(duration)])
+        elif op == "ARCHIVE":
+            queries.append(["ARCHIVE", str(rng.randint(0, horizon))])
         else:
             queries.append(["AGENDA", room])
     return queries
 
 
-def main() -> None:
-    candidate = load_solution("02_meeting_room_scheduler.py")
+def _random_cases() -> list[list[list[str]]]:
+    rng = random.Random(2026)
+    return [_random_case(rng) for _ in range(30)]
+
+
+def scaled_case(rng: random.Random, n: int) -> list[list[str]]:
+    """A case of about `n` queries; rooms and the booking horizon grow with n."""
+    rooms = [f"R{i}" for i in range(max(3, n // 500))]
+    return _random_case(rng, n=n, rooms=rooms, horizon=max(120, n // 2))
+
+
+def _check_rw_lock() -> None:
+    """Readers of one lock share it; a writer waits for them and holds off later readers."""
+    lock = load_module_cached(repo_root() / "Tests" / "02_meeting_room_scheduler.py").RWLock()
+    entered = {name: threading.Event() for name in ("reader", "writer", "late reader")}
+    leave = threading.Event()
+
+    def hold(name: str, mode) -> None:
+        with mode():
+            entered[name].set()
+            leave.wait(5)
 
-    cases: list[list[list[str]]] = [
+    with lock.read():
+        reader = threading.Thread(target=hold, args=("reader", lock.read))
+        reader.start()
+        if not entered["reader"].wait(5):
+            raise AssertionError("rw lock: a second reader blocked behind the first")
+        writer = threading.Thread(target=hold, args=("writer", lock.write))
+        writer.start()
+        if entered["writer"].wait(0.05):
+            raise AssertionError("rw lock: a writer entered while readers held the lock")
+        late = threading.Thread(target=hold, args=("late reader", lock.read))
+        late.start()
+        if entered["late reader"].wait(0.05):
+            raise AssertionError("rw lock: a reader overtook a waiting writer")
+        leave.set()
+    for thread in (reader, writer, late):
+        thread.join(5)
+    if not all(event.is_set() for event in entered.values()):
+        raise AssertionError("rw lock: a waiter never got the lock")
+
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    candidate = SolutionRef("02_meeting_room_scheduler.py")
+    batched = SolutionRef("02_meeting_room_scheduler.py", batched=True)
+    threaded = SolutionRef("02_meeting_room_scheduler.py", threads=4)
+
+    cases: list[Sequence[list[str]]] = [
         [
             ["BOOK", "R1", "10", "20", "standup"],
             ["BOOK", "R1", "20", "30", "retro"],
@@ -182,23 +368,91 @@ def main() -> None:
             ["MOVE", "R1", "a", "5", "15"],  # should fail (overlaps none? depends which 'a' remains)
             ["AGENDA", "R1"],
         ],
+        [
+            ["NEXT_SLOT", "R1", "9", "45"],  # empty room: 9
+            ["BOOK", "R1", "0", "60", "a"],
+            ["BOOK", "R1", "90", "120", "b"],
+            ["BOOK", "R1", "130", "200", "c"],
+            ["NEXT_SLOT", "R1", "9", "30"],  # 60, the gap up to 90 fits exactly
+            ["NEXT_SLOT", "R1", "9", "45"],  # 200, after the last event
+            ["NEXT_SLOT", "R1", "70", "10"],  # 70, inside the gap
+            ["NEXT_SLOT", "R1", "85", "10"],  # 120
+            ["CANCEL", "R1", "b"],
+            ["NEXT_SLOT", "R1", "9", "45"],  # 60 once b is gone
+            ["MOVE", "R1", "c", "70", "100"],
+            ["NEXT_SLOT", "R1", "9", "45"],  # 100
+            ["NEXT_SLOT", "R1", "9", "0"],  # -1
+            ["NEXT_SLOT", "R2", "-5", "10"],  # -5, unknown room
+        ],
+        [
+            ["BOOK", "R1", "0", "10", "a"],
+            ["BOOK", "R1", "10", "20", "b"],
+            ["BOOK", "R1", "30", "40", "a"],
+            ["BOOK", "R1", "50", "60", "c"],
+            ["ARCHIVE", "40"],  # a, b and the second a go cold; c stays hot
+            ["AGENDA", "R1"],
+            ["FREE", "R1", "5", "55"],  # 50 - (5 + 10 + 10 + 5)
+            ["BOOK", "R1", "35", "45", "clash"],  # overlaps an archived event
+            ["BOOK", "R1", "20", "30", "d"],  # fills the archived gap
+            ["CANCEL", "R1", "a"],  # the earliest "a" is archived
+            ["MOVE", "R1", "b", "28", "32"],  # archived b collides with d and the second a
+            ["MOVE", "R1", "b", "0", "5"],  # archived b moves back into the hot tier
+            ["NEXT_SLOT", "R1", "0", "10"],
+            ["AGENDA", "R1"],
+            ["ARCHIVE", "100"],
+            ["CANCEL", "R1", "b"],
+            ["CANCEL", "R1", "a"],
+            ["CANCEL", "R1", "c"],
+            ["CANCEL", "R1", "d"],
+            ["AGENDA", "R1"],  # every segment emptied
+            ["FREE", "R1", "0", "100"],
+        ],
+        [
+            ["BOOK", "R1", "0", "10", "a"],
+            ["BOOK", "R1", "20", "30", "b"],
+            ["BOOK", "R1", "40", "50", "c"],
+            ["ARCHIVE", "50"],  # every event goes cold
+            ["BOOK", "R1", "12", "18", "d"],  # hot events between archived ones
+            ["BOOK", "R1", "32", "38", "e"],
+            ["NEXT_SLOT", "R1", "0", "2"],  # 10, an archived gap closed by a hot event
+            ["NEXT_SLOT", "R1", "11", "2"],  # 18
+            ["NEXT_SLOT", "R1", "0", "3"],  # 50, every gap is 2 wide
+            ["NEXT_SLOT", "R1", "55", "3"],  # 55
+            ["ARCHIVE", "60"],  # d and e join the segment
+            ["NEXT_SLOT", "R1", "19", "2"],  # 30
+            ["CANCEL", "R1", "b"],
+            ["NEXT_SLOT", "R1", "19", "12"],  # 19, b's minutes are free again
+        ],
+        # One busy room, so the slot tree grows deep and is rebuilt by many BOOK/CANCEL/MOVE.
+        _random_case(random.Random(46), n=1500, rooms=["R1"], horizon=3000),
     ]
 
-    rng = random.Random(2026)
-    for _ in range(30):
-        cases.append(_random_case(rng))
+    cases.extend(load_cases("verify_02_meeting_room_scheduler", _random_cases, corpus_dir=args.corpus))
 
     try:
-        for i, queries in enumerate(cases, start=1):
-            expected = _oracle(deepcopy(queries))
-            got = run_solution(candidate, deepcopy(queries), context=f"case {i}")
-            assert_is_list_of_str(got, context=f"case {i}: return type")
-            assert_equal(got, expected, context=f"case {i}")
+        _check_rw_lock()
+        candidates = {"": candidate, "batched reads": batched, "4 threads": threaded, "fast oracle": _fast_oracle}
+        results = run_cases(cases, _oracle, candidates, workers=args.workers)
+        if args.scale:
+            scaled = load_scaled_cases("verify_02_meeting_room_scheduler", scaled_case, args.scale, corpus_dir=args.corpus)
+            results += run_cases(
+                scaled, _fast_oracle, {"": candidate}, workers=args.workers, first_index=len(cases) + 1
+            )
+        if args.complexity:
+            slope = check_complexity(
+                candidate,
+                lambda n: scaled_case(random.Random(n), n),
+                budget=COMPLEXITY_BUDGET,
+                context="complexity",
+            )
+            print(f"verify_02_meeting_room_scheduler: runtime ~ n^{slope:.2f} (budget n^{COMPLEXITY_BUDGET:.2f})")
     except AssertionError as e:
         print(f"verify_02_meeting_room_scheduler: FAIL\n{e}")
         raise SystemExit(1)
 
-    print("verify_02_meeting_room_scheduler: PASS")
+    print(f"verify_02_meeting_room_scheduler: PASS ({format_timings(results)})")
+    if args.timings:
+        print(format_case_timings(results))
 
 
 if __name__ == "__main__":
@@ -1,10 +1,27 @@
 from __future__ import annotations
 
 import random
-from copy import deepcopy
-from typing import Any
+from typing import Any, Sequence
 
-from _harness import assert_equal, assert_is_list_of_str, load_solution, run_solution
+from _harness import (
+    NEAR_LINEAR,
+    SolutionRef,
+    check_complexity,
+    format_case_timings,
+    format_timings,
+    load_cases,
+    load_module_cached,
+    load_scaled_cases,
+    parse_args,
+    repo_root,
+    run_cases,
+)
+
+
+COMPLEXITY_BUDGET = NEAR_LINEAR
+
+# Fields the "indexed" candidate keeps secondary indexes for; FIND on "c" and "d" still takes the scan path.
+INDEXED_FIELDS = ("a", "b")
 
 
 def _oracle(queries: list[list[str]]) -> list[str]:
@@ -42,6 +59,9 @@ def _oracle(queries: list[list[str]]) -> list[str]:
             else:
                 items = sorted(fields.items(), key=lambda kv: kv[0])
                 outputs.append(",".join(f"{f}={v}" for f, v in items))
+        elif kind == "FIND":
+            field, value = q[1], q[2]
+            outputs.append(",".join(sorted(k for k, fields in cur().items() if fields.get(field) == value)))
         elif kind == "BEGIN":
             states.append(copy.deepcopy(cur()))
         elif kind == "COMMIT":
@@ -63,17 +83,86 @@ def _oracle(queries: list[list[str]]) -> list[str]:
     return outputs
 
 
-def _random_case(rng: random.Random) -> list[list[str]]:
-    keys = ["k1", "k2", "k3"]
-    fields = ["a", "b", "c", "d"]
+def _fast_oracle(queries: Sequence[list[str]]) -> list[str]:
+    # Independent of _oracle: one live store plus an undo journal per open transaction.
+    store: dict[str, dict[str, str]] = {}
+    journals: list[list[tuple[str, str, str | None]]] = []
+    outputs: list[str] = []
+
+    def write(key: str, field: str, value: str | None) -> None:
+        fields = store.get(key)
+        if journals:
+            journals[-1].append((key, field, None if fields is None else fields.get(field)))
+        if value is not None:
+            store.setdefault(key, {})[field] = value
+        elif fields is not None:
+            fields.pop(field, None)
+            if not fields:
+                del store[key]
+
+    for q in queries:
+        kind = q[0]
+        if kind == "SET":
+            write(q[1], q[2], q[3])
+        elif kind == "GET":
+            outputs.append(store.get(q[1], {}).get(q[2], ""))
+        elif kind == "DELETE":
+            if q[2] in store.get(q[1], {}):
+                write(q[1], q[2], None)
+                outputs.append("true")
+            else:
+                outputs.append("false")
+        elif kind == "FIELDS":
+            outputs.append(",".join(f"{f}={v}" for f, v in sorted(store.get(q[1], {}).items())))
+        elif kind == "FIND":
+            outputs.append(",".join(sorted(k for k in store if store[k].get(q[1]) == q[2])))
+        elif kind == "BEGIN":
+            journals.append([])
+        elif kind == "COMMIT":
+            if not journals:
+                outputs.append("false")
+                continue
+            undo = journals.pop()
+            if journals:
+                journals[-1].extend(undo)
+            outputs.append("true")
+        elif kind == "ROLLBACK":
+            if not journals:
+                outputs.append("false")
+                continue
+            undo = journals.pop()
+            outer, journals = journals, []  # replay without journaling
+            for key, field, previous in reversed(undo):
+                write(key, field, previous)
+            journals = outer
+            outputs.append("true")
+        else:
+            raise ValueError(f"Unknown query type: {kind!r}")
+
+    return outputs
+
+def _random_case(
+    rng: random.Random,
+    *,
+    n: int | None = None,
+    keys: list[str] | None = None,
+    fields: list[str] | None = None,
+    find_weight: float = 0.06,
+) -> list[list[str]]:
+    if keys is None:
+        keys = ["k1", "k2", "k3"]
+    if fields is None:
+        fields = ["a", "b", "c", "d"]
     values = ["v1", "v2", "v3", "v4", "v5"]
 
     queries: list[list[str]] = []
     depth = 0
-    for _ in range(rng.randint(60, 180)):
+    if n is None:
+        n = rng.randint(60, 180)
+    for _ in range(n):
         op = rng.choices(
-            population=["SET", "GET", "DELETE", "FIELDS", "BEGIN", "COMMIT", "ROLLBACK"],
-            weights=[0.32, 0.18, 0.14, 0.10, 0.10, 0.08, 0.08],
+            population=["SET", "GET", "DELETE", "FIELDS", "BEGIN", "COMMIT", "ROLLBACK", "FIND"],
+            weights=[0.32, 0.18, 0.14, 0.10, 0.10, 0.08, 0.08, find_weight],
         )[0]
         if op == "BEGIN":
             depth += 1
@@ -99,6 +188,8 @@ def _random_case(rng: random.Random) -> list[list[str]]:
             queries.append(["GET", key, field])
         elif op == "DELETE":
             queries.append(["DELETE", key, field])
+        elif op == "FIND":
+            queries.append(["FIND", field, rng.choice(values)])
         else:
             queries.append(["FIELDS", key])
 
@@ -108,10 +199,63 @@ def _random_case(rng: random.Random) -> list[list[str]]:
     return queries
 
 
-def main() -> None:
-    candidate = load_solution("03_transactional_kv_store.py")
+def _random_cases() -> list[list[list[str]]]:
+    rng = random.Random(9001)
+    return [_random_case(rng) for _ in range(35)]
+
+
+def scaled_case(rng: random.Random, n: int) -> list[list[str]]:
+    """A case of about `n` queries over a key space that grows with n."""
+    keys = [f"k{i}" for i in range(max(3, n // 50))]
+    fields = [f"f{i}" for i in range(16)]
+    # No FIND: without an index it scans every key, which would dominate the default engine's runtime.
+    return _random_case(rng, n=n, keys=keys, fields=fields, find_weight=0)
+
+
+def _check_change_feed(cases: Sequence[Sequence[list[str]]]) -> None:
+    """Mirror each case's base store from Database.feed alone, as a downstream cache would."""
+    engine = load_module_cached(repo_root() / "Tests" / "03_transactional_kv_store.py")
+    for case_index, case in enumerate(cases, 1):
+        context = f"change feed, case {case_index}"
+        db = engine.Database(feed_retention=4)
+        table = engine._table(db)
+        mirror: dict[str, dict[str, str]] = {}
+        applied = 0
+        for i, query in enumerate(case):
+            table[query[0]](query)
+            if i % 30 >= 20:
+                continue  # a consumer that regularly stops reading for a while
+            try:
+                batches = db.feed.since(applied)
+            except ValueError:
+                # Too far behind: re-read everything and resume from the current sequence number.
+                mirror = {key: dict(fields) for key, fields in db.store.items()}
+                applied = db.feed.seq
+                continue
+            for seq, changes in batches:
+                if seq != applied + 1:
+                    raise AssertionError(f"{context}: batch {seq} arrived after {applied}")
+                applied = seq
+                for key, field, value in changes:
+                    if value is None:
+                        mirror[key].pop(field)
+                        if not mirror[key]:
+                            del mirror[key]
+                    else:
+                        mirror.setdefault(key, {})[field] = value
+            if mirror != db.store:
+                # The feed only carries durable changes, so the mirror tracks the base store even mid-transaction.
+                raise AssertionError(f"{context}: mirror diverged from the base store after query {i}: {query}")
 
-    cases: list[list[list[str]]] = [
+
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    candidate = SolutionRef("03_transactional_kv_store.py")
+    batched = SolutionRef("03_transactional_kv_store.py", batched=True)
+    indexed = SolutionRef("03_transactional_kv_store.py", indexes=INDEXED_FIELDS)
+    sharded = SolutionRef("03_transactional_kv_store.py", workers=3, indexes=INDEXED_FIELDS)
+
+    cases: list[Sequence[list[str]]] = [
         [
             ["SET", "u1", "name", "tom"],
             ["BEGIN"],
@@ -142,23 +286,89 @@ def main() -> None:
             ["ROLLBACK"],
             ["FIELDS", "k"],
         ],
+        [
+            ["FIND", "a", "pending"],  # nothing yet
+            ["SET", "j1", "a", "pending"],
+            ["SET", "j2", "a", "pending"],
+            ["SET", "j3", "a", "done"],
+            ["FIND", "a", "pending"],
+            ["BEGIN"],
+            ["SET", "j1", "a", "done"],  # uncommitted changes are visible
+            ["DELETE", "j2", "a"],
+            ["SET", "j4", "a", "pending"],
+            ["FIND", "a", "pending"],
+            ["BEGIN"],
+            ["SET", "j4", "a", "done"],
+            ["SET", "j2", "a", "pending"],
+            ["COMMIT"],  # into the outer transaction, which can still undo it
+            ["FIND", "a", "done"],
+            ["ROLLBACK"],
+            ["FIND", "a", "pending"],
+            ["FIND", "a", "done"],
+            ["SET", "j3", "c", "pending"],  # "c" is not indexed: the scan path
+            ["BEGIN"],
+            ["SET", "j1", "c", "pending"],
+            ["FIND", "c", "pending"],
+            ["COMMIT"],
+            ["FIND", "c", "pending"],
+        ],
+        [
+            ["SET", "x", "a", "0"],
+            ["BEGIN"],
+            ["BEGIN"],
+            ["BEGIN"],
+            ["SET", "y", "a", "3"],  # first write lands three transactions deep
+            ["COMMIT"],
+            ["SET", "x", "a", "2"],
+            ["SET", "z", "a", "2"],
+            ["ROLLBACK"],  # undoes x, z and the committed y together
+            ["GET", "x", "a"],
+            ["GET", "y", "a"],
+            ["FIELDS", "z"],
+            ["SET", "w", "a", "1"],
+            ["DELETE", "x", "a"],
+            ["COMMIT"],
+            ["GET", "w", "a"],
+            ["GET", "x", "a"],
+            ["COMMIT"],
+            ["ROLLBACK"],
+        ],
+        # Enough keys that transactions routinely span every shard of the sharded candidate.
+        _random_case(random.Random(49), n=400, keys=[f"k{i}" for i in range(12)]),
     ]
 
-    rng = random.Random(9001)
-    for _ in range(35):
-        cases.append(_random_case(rng))
+    cases.extend(load_cases("verify_03_transactional_kv_store", _random_cases, corpus_dir=args.corpus))
 
     try:
-        for i, queries in enumerate(cases, start=1):
-            expected = _oracle(deepcopy(queries))
-            got = run_solution(candidate, deepcopy(queries), context=f"case {i}")
-            assert_is_list_of_str(got, context=f"case {i}: return type")
-            assert_equal(got, expected, context=f"case {i}")
+        candidates = {
+            "": candidate,
+            "batched reads": batched,
+            "indexed": indexed,
+            "sharded": sharded,
+            "fast oracle": _fast_oracle,
+        }
+        results = run_cases(cases, _oracle, candidates, workers=args.workers)
+        _check_change_feed(cases)
+        if args.scale:
+            scaled = load_scaled_cases("verify_03_transactional_kv_store", scaled_case, args.scale, corpus_dir=args.corpus)
+            results += run_cases(
+                scaled, _fast_oracle, {"": candidate}, workers=args.workers, first_index=len(cases) + 1
+            )
+        if args.complexity:
+            slope = check_complexity(
+                candidate,
+                lambda n: scaled_case(random.Random(n), n),
+                budget=COMPLEXITY_BUDGET,
+                context="complexity",
+            )
+            print(f"verify_03_transactional_kv_store: runtime ~ n^{slope:.2f} (budget n^{COMPLEXITY_BUDGET:.2f})")
     except AssertionError as e:
         print(f"verify_03_transactional_kv_store: FAIL\n{e}")
         raise SystemExit(1)
 
-    print("verify_03_transactional_kv_store: PASS")
+    print(f"verify_03_transactional_kv_store: PASS ({format_timings(results)})")
+    if args.timings:
+        print(format_case_timings(results))
 
 
 if __name__ == "__main__":
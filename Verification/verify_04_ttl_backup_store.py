@@ -1,9 +1,32 @@
 from __future__ import annotations
 
 import random
+from bisect import bisect_left, bisect_right, insort
 from copy import deepcopy
+from types import ModuleType
+from typing import Sequence
 
-from _harness import assert_equal, assert_is_list_of_str, load_solution, run_solution
+from _harness import (
+    SUPERLINEAR,
+    SolutionRef,
+    assert_equal,
+    check_complexity,
+    format_case_timings,
+    format_timings,
+    load_cases,
+    load_module_cached,
+    load_scaled_cases,
+    parse_args,
+    repo_root,
+    run_cases,
+    run_solution,
+)
+
+
+# BACKUP only records the fields written since its parent, but RESTORE still
+# materialises the whole delta chain, and scaled_case grows the store with n.
+# Measured around n^1.4.
+COMPLEXITY_BUDGET = SUPERLINEAR
 
 
 def _alive(expiry: int | None, now: int) -> bool:
@@ -84,26 +107,115 @@ def _oracle(queries: list[list[str]]) -> list[str]:
                 store = {k: dict(v) for k, v in backups[idx].items()}
                 outputs.append("true")
 
+        elif kind == "COUNT":
+            count = sum(1 for fields in store.values() for _, exp in fields.values() if _alive(exp, now))
+            outputs.append(str(count))
+
         else:
             raise ValueError(f"Unknown query type: {kind!r}")
 
     return outputs
 
 
-def _random_case(rng: random.Random) -> list[list[str]]:
-    keys = ["k1", "k2", "k3"]
-    fields = ["a", "b", "c", "d", "e"]
+def _fast_oracle(queries: Sequence[list[str]]) -> list[str]:
+    # Independent of _oracle: expired entries are never purged; instead a sorted list of
+    # the expiries present answers "how many fields are alive" with one bisect.
+    now = 0
+    store: dict[str, dict[str, tuple[str, int | None]]] = {}
+    expiries: list[int] = []
+    stored = 0  # entries in store, alive or not
+    backups: list[dict[str, dict[str, tuple[str, int | None]]]] = []
+    outputs: list[str] = []
+
+    def alive_count() -> int:
+        return stored - bisect_right(expiries, now)
+
+    def put(key: str, field: str, entry: tuple[str, int | None] | None) -> None:
+        nonlocal stored
+        fields = store.setdefault(key, {})
+        old = fields.pop(field, None)
+        if old is not None:
+            stored -= 1
+            if old[1] is not None:
+                del expiries[bisect_left(expiries, old[1])]
+        if entry is not None:
+            fields[field] = entry
+            stored += 1
+            if entry[1] is not None:
+                insort(expiries, entry[1])
+        if not fields:
+            del store[key]
+
+    def lookup(key: str, field: str) -> tuple[str, int | None] | None:
+        entry = store.get(key, {}).get(field)
+        return entry if entry is not None and _alive(entry[1], now) else None
+
+    for q in queries:
+        kind = q[0]
+        now = int(q[1])
+        if kind == "SET":
+            put(q[2], q[3], (q[4], None))
+        elif kind == "SET_TTL":
+            put(q[2], q[3], (q[4], now + int(q[5])))
+        elif kind == "GET":
+            entry = lookup(q[2], q[3])
+            outputs.append("" if entry is None else entry[0])
+        elif kind == "DELETE":
+            if lookup(q[2], q[3]) is None:
+                outputs.append("false")
+            else:
+                put(q[2], q[3], None)
+                outputs.append("true")
+        elif kind == "FIELDS":
+            fields = store.get(q[2], {})
+            outputs.append(",".join(f"{f}={v}" for f, (v, exp) in sorted(fields.items()) if _alive(exp, now)))
+        elif kind == "BACKUP":
+            snapshot = {}
+            for key, fields in store.items():
+                alive = {f: entry for f, entry in fields.items() if _alive(entry[1], now)}
+                if alive:
+                    snapshot[key] = alive
+            backups.append(snapshot)
+            outputs.append(str(alive_count()))
+        elif kind == "RESTORE":
+            idx = int(q[2])
+            if not 0 <= idx < len(backups):
+                outputs.append("false")
+                continue
+            store = {key: dict(fields) for key, fields in backups[idx].items()}
+            expiries = sorted(exp for fields in store.values() for _, exp in fields.values() if exp is not None)
+            stored = sum(len(fields) for fields in store.values())
+            outputs.append("true")
+        elif kind == "COUNT":
+            outputs.append(str(alive_count()))
+        else:
+            raise ValueError(f"Unknown query type: {kind!r}")
+
+    return outputs
+
+def _random_case(
+    rng: random.Random, *, n: int | None = None, keys: list[str] | None = None, fields: list[str] | None = None
+) -> list[list[str]]:
+    if keys is None:
+        keys = ["k1", "k2", "k3"]
+    if fields is None:
+        fields = ["a", "b", "c", "d", "e"]
     values = ["x", "y", "z", "hello", "world"]
 
     now = 0
     backups = 0
     queries: list[list[str]] = []
-    for _ in range(rng.randint(60, 160)):
+    if n is None:
+        n = rng.randint(60, 160)
+    for _ in range(n):
         now += rng.randint(0, 3)
         op = rng.choices(
-            population=["SET", "SET_TTL", "GET", "DELETE", "FIELDS", "BACKUP", "RESTORE"],
-            weights=[0.18, 0.18, 0.20, 0.12, 0.12, 0.12, 0.08],
+            population=["SET", "SET_TTL", "GET", "DELETE", "FIELDS", "BACKUP", "RESTORE", "COUNT"],
+            weights=[0.18, 0.18, 0.20, 0.12, 0.12, 0.12, 0.08, 0.06],
         )[0]
+        if op == "COUNT":
+            queries.append(["COUNT", str(now)])
+            continue
         if op == "BACKUP":
             backups += 1
             queries.append(["BACKUP", str(now)])
@@ -133,10 +245,104 @@ def _random_case(rng: random.Random) -> list[list[str]]:
     return queries
 
 
-def main() -> None:
-    candidate = load_solution("04_ttl_backup_store.py")
+def _random_cases() -> list[list[list[str]]]:
+    rng = random.Random(424242)
+    return [_random_case(rng) for _ in range(40)]
+
+
+def scaled_case(rng: random.Random, n: int) -> list[list[str]]:
+    """A case of about `n` queries over a key space that grows with n."""
+    keys = [f"k{i}" for i in range(max(3, n // 50))]
+    fields = [f"f{i}" for i in range(16)]
+    return _random_case(rng, n=n, keys=keys, fields=fields)
+
+
+def _ttl_module() -> ModuleType:
+    return load_module_cached(repo_root() / "Tests" / "04_ttl_backup_store.py")
+
+
+def _spilling_solution(queries: list[list[str]]) -> list[str]:
+    # Tiny thresholds so every case exercises delta chains, compaction and the spill file.
+    module = _ttl_module()
+    backups = module.BackupLog(max_chain=2, max_resident=1, background=True)
+    try:
+        return module.solution(queries, module.TTLStore(backups))
+    finally:
+        backups.close()
+
+
+def _check_reused_store(module: ModuleType) -> None:
+    # A caller-owned store keeps its spilled backups open across solution() calls.
+    backups = module.BackupLog(max_chain=2, max_resident=1)
+    db = module.TTLStore(backups)
+    try:
+        first = [
+            ["SET", "1", "k", "a", "x"],
+            ["BACKUP", "1"],
+            ["SET", "2", "k", "b", "y"],
+            ["BACKUP", "2"],
+            ["DELETE", "3", "k", "a"],
+            ["BACKUP", "3"],
+        ]
+        second = [
+            ["RESTORE", "4", "0"],
+            ["FIELDS", "4", "k"],
+            ["RESTORE", "5", "1"],
+            ["FIELDS", "5", "k"],
+        ]
+        got = run_solution(lambda q: module.solution(q, db), deepcopy(first), context="reused store: first call")
+        assert_equal(got, ["1", "2", "true", "1"], context="reused store: first call")
+        got = run_solution(lambda q: module.solution(q, db), deepcopy(second), context="reused store: second call")
+        assert_equal(got, ["true", "a=x", "true", "a=x,b=y"], context="reused store: second call")
+    finally:
+        backups.close()
+
+
+def _check_eviction(module: ModuleType) -> None:
+    # Three fields fit; the fourth write forces one eviction whose victim depends on the policy.
+    queries = [
+        ["SET", "1", "k", "a", "x"],
+        ["SET_TTL", "1", "k", "b", "y", "50"],  # exp 51
+        ["SET_TTL", "1", "k", "c", "z", "20"],  # exp 21
+        ["GET", "2", "k", "a"],
+        ["GET", "2", "k", "a"],
+        ["GET", "2", "k", "c"],
+        ["GET", "2", "k", "c"],
+        ["GET", "2", "k", "b"],  # recency a < c < b, frequency b < a = c
+        ["SET", "3", "k", "d", "w"],
+        ["FIELDS", "3", "k"],
+    ]
+    expected_fields = {"lru": "b=y,c=z,d=w", "lfu": "a=x,c=z,d=w", "volatile-ttl": "a=x,b=y,d=w"}
+    for policy, fields in expected_fields.items():
+        for budget in ({"max_fields": 3}, {"max_bytes": 9}):
+            db = module.TTLStore(policy=policy, **budget)
+            got = run_solution(lambda q: module.solution(q, db), deepcopy(queries), context=f"eviction {policy}")
+            assert_equal(got[-1], fields, context=f"eviction {policy} {budget}")
+            assert_equal(db.stats["evictions"], 1, context=f"eviction {policy} {budget}: eviction count")
+
+    # The ceiling is hard: a write larger than the whole budget is refused and counted,
+    # and neither evicts anything nor replaces the value already stored.
+    oversized = [
+        ["SET", "1", "k", "a", "x"],
+        ["SET", "2", "k", "b", "y" * 50],
+        ["SET_TTL", "3", "k", "a", "z" * 50, "5"],
+        ["FIELDS", "4", "k"],
+        ["COUNT", "9"],
+    ]
+    for policy in expected_fields:
+        db = module.TTLStore(policy=policy, max_bytes=10)
+        got = run_solution(lambda q: module.solution(q, db), deepcopy(oversized), context=f"oversized {policy}")
+        assert_equal(got, ["a=x", "1"], context=f"oversized {policy}")
+        assert_equal(db.used_bytes, 3, context=f"oversized {policy}: used bytes")
+        assert_equal(db.stats["rejected"], 2, context=f"oversized {policy}: rejected writes")
+        assert_equal(db.stats["evictions"], 0, context=f"oversized {policy}: eviction count")
+
 
-    cases: list[list[list[str]]] = [
+def main(argv: list[str] | None = None) -> None:
+    args = parse_args(argv)
+    candidate = SolutionRef("04_ttl_backup_store.py")
+    batched = SolutionRef("04_ttl_backup_store.py", batched=True)
+    cases: list[Sequence[list[str]]] = [
         [
             ["SET_TTL", "10", "k", "a", "1", "5"],  # exp 15
             ["GET", "14", "k", "a"],  # 1
@@ -160,23 +366,54 @@ def main() -> None:
             ["RESTORE", "6", "0"],
             ["FIELDS", "6", "k1"],
         ],
+        [
+            ["SET", "1", "k", "a", "x"],
+            ["SET_TTL", "1", "k", "b", "y", "3"],  # exp 4
+            ["SET_TTL", "1", "j", "a", "z", "10"],  # exp 11
+            ["COUNT", "2"],  # 3
+            ["SET", "2", "k", "a", "x2"],  # overwrite, still 3
+            ["COUNT", "4"],  # k.b expired => 2
+            ["DELETE", "5", "k", "a"],
+            ["COUNT", "5"],  # 1
+            ["BACKUP", "5"],  # 1
+            ["SET", "6", "k", "c", "w"],
+            ["RESTORE", "12", "0"],  # j.a expired by now
+            ["COUNT", "12"],  # 0
+        ],
     ]
 
-    rng = random.Random(424242)
-    for _ in range(40):
-        cases.append(_random_case(rng))
+    cases.extend(load_cases("verify_04_ttl_backup_store", _random_cases, corpus_dir=args.corpus))
 
     try:
-        for i, queries in enumerate(cases, start=1):
-            expected = _oracle(deepcopy(queries))
-            got = run_solution(candidate, deepcopy(queries), context=f"case {i}")
-            assert_is_list_of_str(got, context=f"case {i}: return type")
-            assert_equal(got, expected, context=f"case {i}")
+        _check_eviction(_ttl_module())
+        _check_reused_store(_ttl_module())
+        candidates = {
+            "": candidate,
+            "batched reads": batched,
+            "spilled backups": _spilling_solution,
+            "fast oracle": _fast_oracle,
+        }
+        results = run_cases(cases, _oracle, candidates, workers=args.workers)
+        if args.scale:
+            scaled = load_scaled_cases("verify_04_ttl_backup_store", scaled_case, args.scale, corpus_dir=args.corpus)
+            results += run_cases(
+                scaled, _fast_oracle, {"": candidate}, workers=args.workers, first_index=len(cases) + 1
+            )
+        if args.complexity:
+            slope = check_complexity(
+                candidate,
+                lambda n: scaled_case(random.Random(n), n),
+                budget=COMPLEXITY_BUDGET,
+                context="complexity",
+            )
+            print(f"verify_04_ttl_backup_store: runtime ~ n^{slope:.2f} (budget n^{COMPLEXITY_BUDGET:.2f})")
     except AssertionError as e:
         print(f"verify_04_ttl_backup_store: FAIL\n{e}")
         raise SystemExit(1)
 
-    print("verify_04_ttl_backup_store: PASS")
+    print(f"verify_04_ttl_backup_store: PASS ({format_timings(results)})")
+    if args.timings:
+        print(format_case_timings(results))
 
 
 if __name__ == "__main__":